@@ -0,0 +1,238 @@
+import json
+import logging
+import sqlite3
+import threading
+
+import psycopg2
+from psycopg2.extras import execute_values
+
+from config import (
+    get_db_connection,
+    ANSWER_QUEUE_PATH,
+    ANSWER_QUEUE_BATCH_SIZE,
+    ANSWER_QUEUE_FLUSH_INTERVAL,
+)
+
+logger = logging.getLogger(__name__)
+
+FLUSH_ATTEMPTS_SQL = """
+    INSERT INTO attempts (session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained)
+    VALUES %s
+    ON CONFLICT (session_id, question_id) DO NOTHING
+"""
+
+# Errors that retrying cannot fix, e.g. the question or session was deleted
+# while the attempt was queued. Such rows are moved to dead_attempts.
+PERMANENT_ERRORS = (psycopg2.IntegrityError, psycopg2.DataError)
+
+PENDING_COLUMNS = "session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained"
+
+
+class AnswerQueue:
+    """
+    Durable write-behind queue for scored attempts.
+
+    submit_answer() appends to a local SQLite database in WAL mode and returns
+    as soon as the row is on disk. A background thread moves rows to
+    PostgreSQL in batches and deletes them only after the PostgreSQL commit,
+    so anything left over from a crash is replayed on the next start. Replays
+    are harmless because the insert ignores (session_id, question_id)
+    conflicts, which also lets several gunicorn workers share one file.
+
+    If a batch is rejected, its rows are retried one by one; rows PostgreSQL
+    refuses outright (PERMANENT_ERRORS) are moved to the local dead_attempts
+    table and logged instead of blocking the head of the queue.
+    """
+
+    def __init__(self, path, batch_size, flush_interval):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._local = threading.local()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=FULL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS pending_attempts (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    session_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    question_id INTEGER NOT NULL,
+                    question_type TEXT,
+                    bof_answer TEXT,
+                    tf_answers TEXT,
+                    is_correct INTEGER NOT NULL,
+                    marks_obtained REAL NOT NULL,
+                    UNIQUE (session_id, question_id)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS dead_attempts (
+                    id INTEGER PRIMARY KEY,
+                    session_id TEXT NOT NULL,
+                    user_id TEXT NOT NULL,
+                    question_id INTEGER NOT NULL,
+                    question_type TEXT,
+                    bof_answer TEXT,
+                    tf_answers TEXT,
+                    is_correct INTEGER NOT NULL,
+                    marks_obtained REAL NOT NULL,
+                    error TEXT NOT NULL,
+                    failed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+                )
+            """)
+            self._local.conn = conn
+        return conn
+
+    def enqueue(self, session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks):
+        """
+        Durably queue one scored attempt. A repeat for the same question is
+        ignored; returns False in that case.
+        """
+        cur = self._conn().execute("""
+            INSERT OR IGNORE INTO pending_attempts
+                (session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """, (
+            str(session_id), str(user_id), question_id, q_type, bof_answer,
+            json.dumps(tf_answers) if tf_answers is not None else None,
+            1 if is_correct else 0, float(marks)
+        ))
+        return cur.rowcount > 0
+
+    def pending_question_ids(self, session_id):
+        """Question ids answered in `session_id` that are not in PostgreSQL yet."""
+        rows = self._conn().execute(
+            "SELECT question_id FROM pending_attempts WHERE session_id = ?", (str(session_id),)
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    def flush(self, session_id=None):
+        """
+        Move one batch of pending attempts (optionally only one session's) to
+        PostgreSQL. Returns the number of rows flushed.
+        """
+        conn = self._conn()
+        if session_id is None:
+            rows = conn.execute(
+                "SELECT * FROM pending_attempts ORDER BY id LIMIT ?", (self.batch_size,)
+            ).fetchall()
+        else:
+            rows = conn.execute(
+                "SELECT * FROM pending_attempts WHERE session_id = ? ORDER BY id", (str(session_id),)
+            ).fetchall()
+        if not rows:
+            return 0
+
+        values = [
+            (r[1], r[2], r[3], r[4], r[5], json.loads(r[6]) if r[6] is not None else None, bool(r[7]), r[8])
+            for r in rows
+        ]
+        rejected = self._write(values)
+
+        ids = [r[0] for r in rows]
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for index, error in rejected:
+                row = rows[index]
+                logger.error(
+                    "Answer queue: attempt for session %s question %s rejected by PostgreSQL, "
+                    "moved to dead_attempts: %s", row[1], row[3], error
+                )
+                conn.execute(f"""
+                    INSERT OR REPLACE INTO dead_attempts (id, {PENDING_COLUMNS}, error)
+                    SELECT id, {PENDING_COLUMNS}, ? FROM pending_attempts WHERE id = ?
+                """, (error, row[0]))
+            conn.execute(
+                f"DELETE FROM pending_attempts WHERE id IN ({','.join('?' * len(ids))})", ids
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return len(rows)
+
+    def _write(self, values):
+        """
+        Insert attempts into PostgreSQL. Returns [(index, error)] for the rows
+        rejected with a PERMANENT_ERRORS error; everything else is committed.
+        Other errors (e.g. a lost connection) propagate and nothing is dropped.
+        """
+        with get_db_connection() as pg:
+            cur = pg.cursor()
+            try:
+                try:
+                    execute_values(cur, FLUSH_ATTEMPTS_SQL, values, page_size=self.batch_size)
+                    pg.commit()
+                    return []
+                except PERMANENT_ERRORS:
+                    pg.rollback()
+
+                # One bad row fails the whole batch: retry row by row, each
+                # behind a savepoint so the good rows still commit together.
+                rejected = []
+                for index, value in enumerate(values):
+                    cur.execute("SAVEPOINT flush_row")
+                    try:
+                        execute_values(cur, FLUSH_ATTEMPTS_SQL, [value])
+                    except PERMANENT_ERRORS as e:
+                        cur.execute("ROLLBACK TO SAVEPOINT flush_row")
+                        rejected.append((index, str(e).strip()))
+                    else:
+                        cur.execute("RELEASE SAVEPOINT flush_row")
+                pg.commit()
+                return rejected
+            finally:
+                cur.close()
+
+    def flush_session(self, session_id):
+        """Write everything still pending for a session; call before scoring it."""
+        return self.flush(session_id=session_id)
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                while self.flush() >= self.batch_size:
+                    pass
+            except Exception:
+                logger.exception("Answer queue flush failed; will retry")
+            self._stop.wait(self.flush_interval)
+
+    def start(self):
+        """Replay anything left from a previous run, then flush in the background."""
+        if self._thread is not None:
+            return
+        try:
+            replayed = 0
+            while True:
+                flushed = self.flush()
+                replayed += flushed
+                if flushed < self.batch_size:
+                    break
+            if replayed:
+                logger.info("Answer queue replayed %d pending attempts", replayed)
+        except Exception:
+            logger.exception("Answer queue replay failed; background flusher will retry")
+        self._thread = threading.Thread(target=self._run, name="answer-queue-flusher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        try:
+            while self.flush():
+                pass
+        except Exception:
+            logger.exception("Answer queue final flush failed; rows stay queued for replay")
+
+
+answer_queue = AnswerQueue(ANSWER_QUEUE_PATH, ANSWER_QUEUE_BATCH_SIZE, ANSWER_QUEUE_FLUSH_INTERVAL)
@@ -0,0 +1,77 @@
+"""
+Measure the Flask session cookie for an in-flight quiz: its size and the
+cost of signing (every response that modifies it) and verifying (every
+request) it.
+
+  cookie  progress in the cookie: the whole question id list plus the
+          current index and timing, rewritten on each answer (the old layout)
+  server  quiz_session_id and the current index in the cookie; the question
+          list kept by quiz_progress
+
+No database needed:
+
+    python benchmarks/bench_cookie_session.py --sizes 60 200 500 --runs 2000
+"""
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from main import app  # noqa: E402
+
+
+def _cookie_layout(size):
+    return {
+        "user_id": str(uuid.uuid4()),
+        "username": "candidate",
+        "quiz_session_id": str(uuid.uuid4()),
+        "quiz_question_ids": random.sample(range(1, 20000), size),
+        "quiz_current": size // 2,
+        "quiz_started_at": int(time.time()),
+        "quiz_time_limit": 3600,
+    }
+
+
+def _server_layout(size):
+    quiz_session_id = str(uuid.uuid4())
+    return {
+        "user_id": str(uuid.uuid4()),
+        "username": "candidate",
+        "quiz_session_id": quiz_session_id,
+        "quiz_position": [quiz_session_id, size // 2],
+    }
+
+
+def _measure(serializer, data, runs):
+    start = time.perf_counter()
+    for _ in range(runs):
+        cookie = serializer.dumps(data)
+    sign_us = (time.perf_counter() - start) / runs * 1e6
+
+    start = time.perf_counter()
+    for _ in range(runs):
+        serializer.loads(cookie)
+    verify_us = (time.perf_counter() - start) / runs * 1e6
+    return len(cookie), sign_us, verify_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[60, 200, 500], help="questions per quiz")
+    parser.add_argument("--runs", type=int, default=2000)
+    args = parser.parse_args()
+
+    serializer = app.session_interface.get_signing_serializer(app)
+    print(f"{'size':>5}  {'layout':>6}  {'cookie':>8}  {'sign':>8}  {'verify':>8}")
+    for size in args.sizes:
+        for name, layout in (("cookie", _cookie_layout), ("server", _server_layout)):
+            length, sign_us, verify_us = _measure(serializer, layout(size), args.runs)
+            print(f"{size:>5}  {name:>6}  {length:>7}B  {sign_us:>6.1f}us  {verify_us:>6.1f}us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+"""
+Benchmark dashboard statistics for a synthetic heavy user.
+
+Compares three ways of producing the section progress / overall stats:
+
+  legacy   fetch every attempt row (twice) and aggregate in Python
+  live     LIVE_SECTION_STATS_SQL: GROUP BY in PostgreSQL, one row per section
+  summary  read the maintained user_section_stats rows
+
+Runs against the configured database using temporary copies of the tables,
+so nothing is persisted.
+
+    python benchmarks/bench_dashboard_stats.py --attempts 50000 --runs 10
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import psycopg2  # noqa: E402
+from psycopg2.extras import RealDictCursor  # noqa: E402
+
+from config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD  # noqa: E402
+from user_stats import load_live_section_stats, rebuild, summarize_section_stats  # noqa: E402
+
+SHADOWED_TABLES = ("questions", "sessions", "attempts", "user_section_stats", "user_questions_seen")
+QUESTIONS_PER_SESSION = 60
+
+
+def _seed(cur, user_id, attempts, sections, questions):
+    for table in SHADOWED_TABLES:
+        cur.execute(f"CREATE TEMP TABLE {table} (LIKE public.{table} INCLUDING DEFAULTS)")
+
+    cur.execute("""
+        INSERT INTO questions (id, section, question_type, question_text)
+        SELECT g, 'Section ' || (g %% %(sections)s + 1), CASE WHEN g %% 2 = 0 THEN 'BOF' ELSE 'TF' END, 'Question ' || g
+        FROM generate_series(1, %(questions)s) g
+    """, {"sections": sections, "questions": questions})
+
+    session_count = max(1, attempts // QUESTIONS_PER_SESSION)
+    cur.execute("""
+        INSERT INTO sessions (id, user_id, section_filter, total_questions, bof_count, tf_count,
+                              time_limit_seconds, completed, completed_at, percentage)
+        SELECT gen_random_uuid(), %(user_id)s, 'ALL', %(per_session)s, 0, 0, 3600, TRUE,
+               NOW() - g * INTERVAL '1 hour', round((random() * 100)::numeric, 2)
+        FROM generate_series(1, %(session_count)s) g
+    """, {"user_id": user_id, "per_session": QUESTIONS_PER_SESSION, "session_count": session_count})
+
+    cur.execute("""
+        INSERT INTO attempts (session_id, user_id, question_id, question_type, is_correct, marks_obtained)
+        SELECT s.id, s.user_id, q.id, q.question_type, r.correct, CASE WHEN r.correct THEN 1 ELSE 0 END
+        FROM (SELECT id, user_id, row_number() OVER () AS rn FROM sessions) s
+        CROSS JOIN generate_series(1, %(per_session)s) k
+        JOIN questions q ON q.id = 1 + ((s.rn * %(per_session)s + k) * 7919) %% %(questions)s
+        CROSS JOIN LATERAL (SELECT random() < 0.6 AS correct) r
+    """, {"per_session": QUESTIONS_PER_SESSION, "questions": questions})
+
+
+def _legacy(cur, user_id):
+    """The pre-aggregation dashboard path: O(attempts) rows over the wire, loops in Python."""
+    cur.execute("""
+        SELECT a.session_id, a.question_id, q.section, a.is_correct, a.marks_obtained, s.completed_at
+        FROM attempts a
+        JOIN sessions s ON a.session_id = s.id
+        JOIN questions q ON a.question_id = q.id
+        WHERE s.user_id = %s AND s.completed = TRUE
+    """, (user_id,))
+    rows = cur.fetchall()
+    cur.execute("""
+        SELECT a.question_id, a.is_correct, a.marks_obtained, a.question_type
+        FROM attempts a
+        JOIN sessions s ON a.session_id = s.id
+        WHERE s.user_id = %s AND s.completed = TRUE
+    """, (user_id,))
+    all_attempts = cur.fetchall()
+
+    totals = defaultdict(lambda: {"attempted": 0, "correct": 0, "marks": 0.0, "seen": set()})
+    for row in rows:
+        t = totals[row["section"]]
+        t["attempted"] += 1
+        t["marks"] += float(row["marks_obtained"] or 0)
+        t["seen"].add(row["question_id"])
+        if row["is_correct"]:
+            t["correct"] += 1
+
+    bof = [a for a in all_attempts if a["question_type"] == "BOF"]
+    tf = [a for a in all_attempts if a["question_type"] == "TF"]
+    return totals, len({a["question_id"] for a in all_attempts}), len(bof), len(tf)
+
+
+def _live(cur, user_id):
+    return summarize_section_stats(load_live_section_stats(cur, user_id))
+
+
+def _summary(cur, user_id):
+    cur.execute("SELECT * FROM user_section_stats WHERE user_id = %s", (user_id,))
+    return summarize_section_stats(cur.fetchall())
+
+
+def _time(cur, fn, user_id, runs):
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(cur, user_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--attempts", type=int, default=50000)
+    parser.add_argument("--sections", type=int, default=22)
+    parser.add_argument("--questions", type=int, default=4000)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                            cursor_factory=RealDictCursor)
+    try:
+        cur = conn.cursor()
+        user_id = str(uuid.uuid4())
+        _seed(cur, user_id, args.attempts, args.sections, args.questions)
+        rebuild(cur, user_id)
+        cur.execute("ANALYZE")
+
+        print(f"synthetic user: {args.attempts} attempts over {args.sections} sections")
+        print(f"{'path':>8}  {'p50':>10}  {'max':>10}")
+        for name, fn in (("legacy", _legacy), ("live", _live), ("summary", _summary)):
+            samples = _time(cur, fn, user_id, args.runs)
+            print(f"{name:>8}  {statistics.median(samples):>8.2f}ms  {max(samples):>8.2f}ms")
+        conn.rollback()
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark for explanation formatting on the results page.
+
+  inline    re.split / re.match with pattern strings on every call
+            (as _format_explanation_text used to do)
+  compiled  precompiled patterns, no cache (_render_explanation)
+  cached    _format_explanation_text with a warm LRU keyed by question id
+
+Reads every explanation in the bank from the configured database, or makes
+up `--synthetic N` of them when there is no database. Each run formats a
+200-question results page drawn from the bank; a whole-bank pass is timed
+once per variant.
+
+    python benchmarks/bench_explanations.py --page-size 200 --pages 200
+    python benchmarks/bench_explanations.py --synthetic 5000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from markupsafe import Markup, escape  # noqa: E402
+
+from routes.quiz import _cached_explanation, _format_explanation_text, _render_explanation  # noqa: E402
+
+
+def _inline_format(text, question_id=None):
+    if not text:
+        return Markup("")
+    raw = str(text).replace("\r\n", "\n").strip()
+    if not raw:
+        return Markup("")
+    if "\n" not in raw:
+        sentences = re.split(r"(?<=[.!?])\s+(?=[A-Z])", raw)
+        if len(sentences) >= 3:
+            parts = [" ".join(sentences[i:i + 2]).strip() for i in range(0, len(sentences), 2)]
+        else:
+            parts = [raw]
+    else:
+        parts = [line.strip() for line in raw.split("\n") if line.strip()]
+
+    html_blocks = []
+    list_items = []
+    for part in parts:
+        match = re.match(r"^(?:[-*•]\s+|\d+[.)]\s+)(.+)$", part)
+        if match:
+            list_items.append(f"<li>{escape(match.group(1))}</li>")
+            continue
+        if list_items:
+            html_blocks.append("<ul class=\"explanation-list\">" + "".join(list_items) + "</ul>")
+            list_items = []
+        html_blocks.append(f"<p>{escape(part)}</p>")
+    if list_items:
+        html_blocks.append("<ul class=\"explanation-list\">" + "".join(list_items) + "</ul>")
+    return Markup("".join(html_blocks))
+
+
+def _compiled_format(text, question_id=None):
+    if not text:
+        return Markup("")
+    return _render_explanation(str(text))
+
+
+def _load_explanations():
+    import psycopg2
+    from config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
+
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD)
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT id, explanation FROM questions WHERE explanation IS NOT NULL")
+        return cur.fetchall()
+    finally:
+        conn.close()
+
+
+def _synthetic_explanations(count, rng):
+    words = ("nerve", "artery", "muscle", "flexion", "lateral", "supplies", "origin", "insertion",
+             "vertebra", "ligament", "tendon", "anterior", "posterior", "branch", "plexus")
+
+    def sentence():
+        return " ".join(rng.choice(words) for _ in range(rng.randint(6, 16))).capitalize() + "."
+
+    rows = []
+    for qid in range(1, count + 1):
+        if rng.random() < 0.3:
+            body = "\n".join(f"- {sentence()}" for _ in range(rng.randint(2, 5)))
+            text = sentence() + "\n" + body
+        else:
+            text = " ".join(sentence() for _ in range(rng.randint(2, 8)))
+        rows.append((qid, text))
+    return rows
+
+
+def _time_pages(fmt, pages):
+    start = time.perf_counter()
+    for page in pages:
+        for qid, text in page:
+            fmt(text, qid)
+    return (time.perf_counter() - start) / len(pages) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page-size", type=int, default=200, help="questions on one results page")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--synthetic", type=int, default=0, help="use N made-up explanations instead of the database")
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    bank = _synthetic_explanations(args.synthetic, rng) if args.synthetic else _load_explanations()
+    if not bank:
+        sys.exit("No explanations found")
+    pages = [rng.choices(bank, k=args.page_size) for _ in range(args.pages)]
+    chars = sum(len(text) for _, text in bank) / len(bank)
+    print(f"{len(bank)} explanations, {chars:.0f} chars on average, {args.page_size}-question pages")
+
+    _cached_explanation.cache_clear()
+    start = time.perf_counter()
+    for qid, text in bank:
+        _format_explanation_text(text, qid)
+    cold_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{'variant':>9}  {'bank pass':>10}  {'per page':>10}")
+    for name, fmt in (("inline", _inline_format), ("compiled", _compiled_format)):
+        start = time.perf_counter()
+        for qid, text in bank:
+            fmt(text, qid)
+        bank_ms = (time.perf_counter() - start) * 1000
+        print(f"{name:>9}  {bank_ms:>8.1f}ms  {_time_pages(fmt, pages):>8.3f}ms")
+    print(f"{'cached':>9}  {cold_ms:>8.1f}ms  {_time_pages(_format_explanation_text, pages):>8.3f}ms")
+
+    info = _cached_explanation.cache_info()
+    print(f"cache: {info.currsize}/{info.maxsize} entries, {info.hits} hits, {info.misses} misses")
+
+
+if __name__ == "__main__":
+    main()
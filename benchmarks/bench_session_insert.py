@@ -0,0 +1,97 @@
+"""
+Benchmark quiz creation: per-row session_questions inserts vs the single
+CREATE_SESSION_SQL statement used by quiz.start().
+
+Runs against the configured database (DB_HOST / DB_NAME / ...). Writes go to
+temporary copies of `sessions` and `session_questions`, which shadow the real
+tables for this connection only, so nothing is persisted.
+
+    python benchmarks/bench_session_insert.py --sizes 60 200 500 --runs 30
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import psycopg2  # noqa: E402
+from psycopg2.extras import RealDictCursor  # noqa: E402
+
+from config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD  # noqa: E402
+from routes.quiz import CREATE_SESSION_SQL  # noqa: E402
+
+
+def _setup(cur):
+    cur.execute("CREATE TEMP TABLE sessions (LIKE public.sessions INCLUDING DEFAULTS)")
+    cur.execute("CREATE TEMP TABLE session_questions (LIKE public.session_questions INCLUDING DEFAULTS)")
+    cur.execute("SELECT id FROM users LIMIT 1")
+    row = cur.fetchone()
+    return row["id"] if row else str(uuid.uuid4())
+
+
+def _insert_per_row(cur, user_id, question_ids):
+    session_id = str(uuid.uuid4())
+    cur.execute("""
+        INSERT INTO sessions (id, user_id, section_filter, total_questions, bof_count, tf_count, time_limit_seconds)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING started_at
+    """, (session_id, user_id, "ALL", len(question_ids), 0, len(question_ids), 3600))
+    cur.fetchone()
+    for i, qid in enumerate(question_ids):
+        cur.execute("""
+            INSERT INTO session_questions (session_id, question_id, question_order)
+            VALUES (%s, %s, %s)
+        """, (session_id, qid, i + 1))
+
+
+def _insert_batched(cur, user_id, question_ids):
+    session_id = str(uuid.uuid4())
+    cur.execute(CREATE_SESSION_SQL, (
+        session_id, user_id, "ALL", len(question_ids), 0, len(question_ids), 3600, question_ids
+    ))
+    cur.fetchone()
+
+
+def _time(conn, fn, user_id, question_ids, runs):
+    samples = []
+    cur = conn.cursor()
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(cur, user_id, question_ids)
+        conn.commit()
+        samples.append((time.perf_counter() - start) * 1000)
+    cur.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[60, 200, 500])
+    parser.add_argument("--runs", type=int, default=30)
+    args = parser.parse_args()
+
+    conn = psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                            cursor_factory=RealDictCursor)
+    try:
+        cur = conn.cursor()
+        user_id = _setup(cur)
+        conn.commit()
+        cur.close()
+
+        print(f"{'questions':>9}  {'per-row p50':>12}  {'batched p50':>12}  {'speedup':>8}")
+        for size in args.sizes:
+            question_ids = list(range(1, size + 1))
+            before = _time(conn, _insert_per_row, user_id, question_ids, args.runs)
+            after = _time(conn, _insert_batched, user_id, question_ids, args.runs)
+            p50_before = statistics.median(before)
+            p50_after = statistics.median(after)
+            print(f"{size:>9}  {p50_before:>10.2f}ms  {p50_after:>10.2f}ms  {p50_before / p50_after:>7.1f}x")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
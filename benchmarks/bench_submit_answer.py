@@ -0,0 +1,129 @@
+"""
+Load test for answer submission under concurrent submitters.
+
+  legacy  duplicate check, question type lookup, answer-key lookup, insert
+          (four round-trips, as submit_answer() used to do)
+  single  score from the cached answer key, then INSERT_ATTEMPT_SQL
+          (one round-trip guarded by ON CONFLICT DO NOTHING)
+
+Reads questions/options from the configured database. Every worker writes
+to its own temporary copy of `attempts`, so nothing is persisted.
+
+    python benchmarks/bench_submit_answer.py --workers 16 --submits 500
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import psycopg2  # noqa: E402
+from psycopg2.extras import RealDictCursor  # noqa: E402
+
+from config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD  # noqa: E402
+from question_bank import question_bank  # noqa: E402
+from routes.quiz import INSERT_ATTEMPT_SQL, _score_answer  # noqa: E402
+
+
+def _connect():
+    return psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                            cursor_factory=RealDictCursor)
+
+
+def _legacy_submit(cur, session_id, user_id, question_id, form):
+    cur.execute("SELECT id FROM attempts WHERE session_id = %s AND question_id = %s", (session_id, question_id))
+    if cur.fetchone():
+        return
+    cur.execute("SELECT question_type FROM questions WHERE id = %s", (question_id,))
+    q_type = cur.fetchone()["question_type"]
+    cur.execute("SELECT option_label FROM options WHERE question_id = %s AND is_correct = TRUE", (question_id,))
+    correct = cur.fetchone()
+    is_correct = correct is not None and form["bof_answer"] == correct["option_label"]
+    cur.execute("""
+        INSERT INTO attempts (session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained)
+        VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    """, (session_id, user_id, question_id, q_type, form["bof_answer"], None, is_correct, 1 if is_correct else 0))
+
+
+def _single_submit(cur, session_id, user_id, question_id, form):
+    entry = question_bank.get(question_id)
+    q_type, bof_answer, tf_answers, is_correct, marks = _score_answer(entry, form)
+    cur.execute(INSERT_ATTEMPT_SQL, (session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks))
+
+
+def _worker(submit, question_ids, submits, latencies, barrier):
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("CREATE TEMP TABLE attempts (LIKE public.attempts INCLUDING DEFAULTS)")
+        cur.execute("CREATE UNIQUE INDEX ON attempts (session_id, question_id)")
+        conn.commit()
+
+        user_id = str(uuid.uuid4())
+        session_id = str(uuid.uuid4())
+        local = []
+        barrier.wait()
+        for i in range(submits):
+            if i % len(question_ids) == 0:
+                session_id = str(uuid.uuid4())
+            question_id = question_ids[i % len(question_ids)]
+            form = {"bof_answer": random.choice("ABCDE")}
+            start = time.perf_counter()
+            submit(cur, session_id, user_id, question_id, form)
+            conn.commit()
+            local.append((time.perf_counter() - start) * 1000)
+        latencies.extend(local)
+    finally:
+        conn.close()
+
+
+def _run(submit, question_ids, workers, submits):
+    latencies = []
+    barrier = threading.Barrier(workers + 1)
+    threads = [
+        threading.Thread(target=_worker, args=(submit, question_ids, submits, latencies, barrier))
+        for _ in range(workers)
+    ]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    return latencies, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--submits", type=int, default=500, help="submissions per worker")
+    args = parser.parse_args()
+
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        cur.execute("SELECT id FROM questions WHERE question_type = 'BOF' ORDER BY id LIMIT 200")
+        question_ids = [r["id"] for r in cur.fetchall()]
+        question_bank.get_many(question_ids, cur=cur)
+    finally:
+        conn.close()
+    if not question_ids:
+        sys.exit("No BOF questions in the configured database.")
+
+    print(f"{args.workers} concurrent submitters x {args.submits} answers")
+    print(f"{'path':>7}  {'p50':>9}  {'p99':>9}  {'answers/s':>10}")
+    for name, submit in (("legacy", _legacy_submit), ("single", _single_submit)):
+        latencies, elapsed = _run(submit, question_ids, args.workers, args.submits)
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{name:>7}  {statistics.median(latencies):>7.2f}ms  {p99:>7.2f}ms  {len(latencies) / elapsed:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,276 @@
+"""
+Generate a large, deterministic history for scale testing.
+
+Creates synthetic users with completed sessions, their session_questions and
+attempts, and bookmarks. All of it is bulk-loaded with COPY, then the
+dashboard aggregates (section_progress, user_section_stats) are rebuilt from
+it. Questions come from the bank already in the database; seed one first with
+
+    python benchmarks/load_quiz.py --setup-schema --seed
+
+The same --seed over the same bank always produces the same rows, so
+performance work on dashboard.home(), _build_results_payload() and the
+bookmarks page can be reproduced:
+
+    # 2000 users x 50 sessions, 10 heavy users x 3000 sessions (~13M attempts)
+    python benchmarks/generate_data.py --users 2000 --sessions 50 \\
+        --heavy-users 10 --heavy-sessions 3000 --questions 60 --skew 1.2
+
+Use a scratch database. --reset deletes previously generated users (and,
+by cascade, their history) before loading.
+"""
+import argparse
+import io
+import os
+import random
+import sys
+import time
+import uuid
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import bcrypt  # noqa: E402
+import psycopg2  # noqa: E402
+from psycopg2.extras import RealDictCursor  # noqa: E402
+
+from config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD  # noqa: E402
+from question_bank import _load_questions  # noqa: E402
+from routes.quiz import _score_answer  # noqa: E402
+from user_stats import rebuild  # noqa: E402
+
+USER_EMAIL = "synthetic{}@example.invalid"
+USER_PASSWORD = "synthetic-password"
+PASSWORD_SALT = b"$2b$12$syntheticdatasaltsynte"
+
+# COPY targets in foreign-key order; buffers are always flushed in this order.
+COPY_COLUMNS = {
+    "users": ("id", "username", "email", "password_hash", "created_at"),
+    "sessions": ("id", "user_id", "section_filter", "total_questions", "bof_count", "tf_count",
+                 "time_limit_seconds", "started_at", "completed", "completed_at", "score", "total_score",
+                 "percentage"),
+    "session_questions": ("session_id", "question_id", "question_order"),
+    "attempts": ("session_id", "user_id", "question_id", "question_type", "bof_answer", "tf_answers",
+                 "is_correct", "marks_obtained", "answered_at"),
+    "bookmarks": ("user_id", "question_id", "created_at"),
+}
+
+# Rebuilt from the generated attempts, as quiz.finish() would have kept it.
+REBUILD_SECTION_PROGRESS_SQL = """
+    INSERT INTO section_progress (user_id, section, questions_attempted, questions_correct, best_score_percentage, last_attempted)
+    SELECT user_id, section, SUM(total), SUM(correct), MAX(pct), MAX(completed_at)
+    FROM (
+        SELECT s.user_id, q.section, s.completed_at,
+               COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE a.is_correct) AS correct,
+               ROUND(COALESCE(SUM(a.marks_obtained), 0) * 100.0 / COUNT(*), 2) AS pct
+        FROM attempts a
+        JOIN sessions s ON s.id = a.session_id
+        JOIN questions q ON q.id = a.question_id
+        WHERE s.user_id = ANY(%s::uuid[])
+        GROUP BY s.id, s.user_id, q.section, s.completed_at
+    ) per_session
+    GROUP BY user_id, section
+"""
+
+
+def _connect():
+    return psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                            cursor_factory=RealDictCursor)
+
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, bool):
+        return "t" if value else "f"
+    if isinstance(value, list):
+        return "{" + ",".join("NULL" if v is None else ("t" if v else "f") for v in value) + "}"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    # Generated text never contains tabs, newlines or backslashes.
+    return str(value)
+
+
+class _CopyWriter:
+    """Buffers rows per table and streams them with COPY once `chunk_rows` are pending."""
+
+    def __init__(self, cur, chunk_rows):
+        self.cur = cur
+        self.chunk_rows = chunk_rows
+        self.buffers = {table: io.StringIO() for table in COPY_COLUMNS}
+        self.pending = 0
+        self.counts = defaultdict(int)
+
+    def add(self, table, row):
+        self.buffers[table].write("\t".join(_copy_value(v) for v in row) + "\n")
+        self.counts[table] += 1
+        self.pending += 1
+        if self.pending >= self.chunk_rows:
+            self.flush()
+
+    def flush(self):
+        for table, columns in COPY_COLUMNS.items():
+            buf = self.buffers[table]
+            if not buf.tell():
+                continue
+            buf.seek(0)
+            self.cur.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buf)
+            self.buffers[table] = io.StringIO()
+        self.pending = 0
+
+
+def _uuid(rng):
+    return str(uuid.UUID(int=rng.getrandbits(128), version=4))
+
+
+def _section_weights(sections, skew):
+    """Zipf-like popularity: the section at rank r is drawn with weight 1 / r**skew."""
+    return [1.0 / (rank ** skew) for rank in range(1, len(sections) + 1)]
+
+
+def _answer(entry, ability, rng):
+    """Form data for one answer; each choice is right with probability `ability`."""
+    question = entry["question"]
+    if question["question_type"] == "BOF":
+        labels = [o["option_label"] for o in entry["options"]]
+        if rng.random() < ability or len(labels) < 2:
+            return {"bof_answer": entry["correct_label"]}
+        return {"bof_answer": rng.choice([label for label in labels if label != entry["correct_label"]])}
+
+    form = {}
+    for stmt in entry["tf_statements"]:
+        if rng.random() < 0.05:
+            continue  # left unanswered
+        right = rng.random() < ability
+        form[f"tf_{stmt['statement_number']}"] = "true" if stmt["is_true"] == right else "false"
+    return form
+
+
+def _generate_user(out, rng, index, password_hash, bank, sections, weights, sessions, bookmarks,
+                   questions_per_session, end, days):
+    user_id = _uuid(rng)
+    created_at = end - timedelta(days=days + rng.random() * 30)
+    out.add("users", (user_id, f"synthetic{index}", USER_EMAIL.format(index), password_hash, created_at))
+
+    ability = rng.uniform(0.35, 0.9)
+    # Spread the history over `days`, oldest first.
+    starts = sorted(end - timedelta(seconds=rng.random() * days * 86400) for _ in range(sessions))
+    for started_at in starts:
+        session_id = _uuid(rng)
+        # Sorted, since set order of str varies with PYTHONHASHSEED.
+        chosen = sorted(set(rng.choices(sections, weights, k=rng.randint(1, min(4, len(sections))))))
+        pool = [qid for s in chosen for qid in bank["by_section"][s]]
+        question_ids = rng.sample(pool, min(questions_per_session, len(pool)))
+
+        answered_at = started_at
+        total_marks = 0
+        bof_count = 0
+        attempts = []
+        for question_id in question_ids:
+            entry = bank["entries"][question_id]
+            answered_at += timedelta(seconds=rng.randint(10, 90))
+            q_type, bof_answer, tf_answers, is_correct, marks = _score_answer(entry, _answer(entry, ability, rng))
+            total_marks += marks
+            bof_count += q_type == "BOF"
+            attempts.append((session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks,
+                             answered_at))
+
+        total = len(question_ids)
+        section_filter = ", ".join(chosen[:3]) + ("..." if len(chosen) > 3 else "")
+        out.add("sessions", (
+            session_id, user_id, section_filter, total, bof_count, total - bof_count, 3600,
+            started_at, True, answered_at, round(total_marks, 1), total,
+            round(total_marks * 100.0 / total, 2) if total else 0,
+        ))
+        for order, question_id in enumerate(question_ids, start=1):
+            out.add("session_questions", (session_id, question_id, order))
+        for row in attempts:
+            out.add("attempts", row)
+
+    all_ids = bank["all_ids"]
+    for question_id in rng.sample(all_ids, min(bookmarks, len(all_ids))):
+        out.add("bookmarks", (user_id, question_id, end - timedelta(seconds=rng.random() * days * 86400)))
+    return user_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--users", type=int, default=1000, help="regular users")
+    parser.add_argument("--sessions", type=int, default=20, help="completed sessions per regular user")
+    parser.add_argument("--heavy-users", type=int, default=5)
+    parser.add_argument("--heavy-sessions", type=int, default=2000, help="completed sessions per heavy user")
+    parser.add_argument("--questions", type=int, default=60, help="questions per session")
+    parser.add_argument("--bookmarks", type=int, default=20, help="bookmarks per regular user")
+    parser.add_argument("--heavy-bookmarks", type=int, default=1000, help="bookmarks per heavy user")
+    parser.add_argument("--skew", type=float, default=1.0,
+                        help="section popularity exponent (0 = uniform, higher = a few sections dominate)")
+    parser.add_argument("--days", type=int, default=365, help="history depth in days")
+    parser.add_argument("--end", default="2026-01-01", help="timestamp of the newest generated activity (UTC)")
+    parser.add_argument("--chunk-rows", type=int, default=200_000, help="rows buffered per COPY round")
+    parser.add_argument("--reset", action="store_true", help="delete previously generated users first")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    end = datetime.fromisoformat(args.end).replace(tzinfo=timezone.utc)
+    started = time.perf_counter()
+
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        if args.reset:
+            cur.execute("DELETE FROM users WHERE email LIKE %s", (USER_EMAIL.format("%"),))
+            print(f"removed {cur.rowcount} generated users")
+
+        cur.execute("SELECT id, section FROM questions ORDER BY id")
+        rows = cur.fetchall()
+        if not rows:
+            sys.exit("The question bank is empty; seed one with benchmarks/load_quiz.py --seed.")
+        entries = _load_questions(cur, [r["id"] for r in rows])
+        by_section = defaultdict(list)
+        for r in rows:
+            by_section[r["section"]].append(r["id"])
+        bank = {"entries": entries, "by_section": by_section, "all_ids": [r["id"] for r in rows]}
+
+        # Shuffle once so section popularity does not simply follow id order.
+        sections = sorted(by_section)
+        rng.shuffle(sections)
+        weights = _section_weights(sections, args.skew)
+
+        # A fixed salt keeps the users rows deterministic too.
+        password_hash = bcrypt.hashpw(USER_PASSWORD.encode("utf-8"), PASSWORD_SALT).decode("utf-8")
+
+        out = _CopyWriter(cur, args.chunk_rows)
+        user_ids = []
+        for i in range(args.heavy_users + args.users):
+            heavy = i < args.heavy_users
+            user_ids.append(_generate_user(
+                out, rng, i, password_hash, bank, sections, weights,
+                args.heavy_sessions if heavy else args.sessions,
+                args.heavy_bookmarks if heavy else args.bookmarks,
+                args.questions, end, args.days,
+            ))
+        out.flush()
+
+        cur.execute(REBUILD_SECTION_PROGRESS_SQL, (user_ids,))
+        rebuild(cur)
+        conn.commit()
+
+        # Fresh planner statistics, so timings reflect steady state.
+        conn.autocommit = True
+        for table in COPY_COLUMNS:
+            cur.execute(f"ANALYZE {table}")
+        for table in ("section_progress", "user_section_stats", "user_questions_seen"):
+            cur.execute(f"ANALYZE {table}")
+    finally:
+        conn.close()
+
+    print(f"loaded in {time.perf_counter() - started:.1f}s:")
+    for table in COPY_COLUMNS:
+        print(f"  {table:<18} {out.counts[table]:>12,}")
+
+
+if __name__ == "__main__":
+    main()
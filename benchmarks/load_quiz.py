@@ -0,0 +1,349 @@
+"""
+Load test for the whole quiz flow over HTTP.
+
+Each simulated user logs in once, then runs --rounds quizzes of
+--questions questions the way the quiz page does (--answer-via api):
+
+    POST /login -> POST /start -> GET /question -> POST /api/quiz/answer x k
+    -> GET /finish -> GET /results
+
+or the way the no-JS form does (--answer-via form):
+
+    ... -> (GET /question, POST /submit_answer) x k -> ...
+
+and the run reports throughput plus p50/p95/p99 latency per endpoint.
+
+By default the app is served in-process by a threaded werkzeug server on a
+free port and talks to the configured database (DB_HOST / DB_NAME / ...).
+Point --url at a running gunicorn to measure that instead. The flow writes
+sessions and attempts, so use a scratch database:
+
+    # once: create the tables, a synthetic bank and the load users
+    python benchmarks/load_quiz.py --setup-schema --seed --sections 22 --bof 40 --tf 40 --users 50
+    # then, as often as needed
+    python benchmarks/load_quiz.py --users 50 --questions 20 --rounds 3
+"""
+import argparse
+import glob
+import http.client
+import json
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import bcrypt  # noqa: E402
+import psycopg2  # noqa: E402
+from psycopg2.extras import RealDictCursor, execute_values  # noqa: E402
+
+from config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD  # noqa: E402
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+SECTION_NAME = "Load section {:02d}"
+USER_EMAIL = "loadtest{}@example.invalid"
+USER_PASSWORD = "loadtest-password"
+BOF_LABELS = "ABCDE"
+TF_STATEMENTS = 5
+QUESTION_ID_RE = re.compile(rb'name="question_id" id="question_id_input" value="(\d+)"')
+
+
+def _connect():
+    return psycopg2.connect(host=DB_HOST, database=DB_NAME, user=DB_USER, password=DB_PASSWORD,
+                            cursor_factory=RealDictCursor)
+
+
+def setup_schema(cur):
+    """Create the base tables and apply every migration, in order."""
+    paths = [os.path.join(HERE, "schema.sql")]
+    paths += sorted(glob.glob(os.path.join(HERE, "..", "migrations", "*.sql")))
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            cur.execute(f.read())
+
+
+def seed_bank(cur, sections, bof_per_section, tf_per_section, rng):
+    """Insert `sections` synthetic sections; ones that already exist are left alone."""
+    created = 0
+    for s in range(1, sections + 1):
+        name = SECTION_NAME.format(s)
+        cur.execute("INSERT INTO sections (section_name) VALUES (%s) ON CONFLICT DO NOTHING RETURNING id", (name,))
+        if not cur.fetchone():
+            continue
+        created += 1
+
+        rows = [(name, "BOF", f"{name}: best-of-five question {i}", f"Explanation for BOF {i}. It cites a source.")
+                for i in range(bof_per_section)]
+        rows += [(name, "TF", f"{name}: true/false stem {i}", f"Explanation for TF {i}.")
+                 for i in range(tf_per_section)]
+        ids = execute_values(cur, """
+            INSERT INTO questions (section, question_type, question_text, explanation) VALUES %s RETURNING id
+        """, rows, fetch=True)
+
+        options, statements = [], []
+        for row, (_, q_type, _, _) in zip(ids, rows):
+            if q_type == "BOF":
+                correct = rng.choice(BOF_LABELS)
+                options += [(row["id"], label, f"Option {label}", label == correct) for label in BOF_LABELS]
+            else:
+                statements += [(row["id"], n, f"Statement {n}", rng.random() < 0.5)
+                               for n in range(1, TF_STATEMENTS + 1)]
+        if options:
+            execute_values(cur, "INSERT INTO options (question_id, option_label, option_text, is_correct) VALUES %s",
+                           options)
+        if statements:
+            execute_values(cur, """
+                INSERT INTO tf_statements (question_id, statement_number, statement_text, is_true) VALUES %s
+            """, statements)
+    return created
+
+
+def seed_users(cur, users):
+    # One hash for everyone: seeding should not take users x bcrypt cost.
+    password_hash = bcrypt.hashpw(USER_PASSWORD.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+    execute_values(cur, """
+        INSERT INTO users (id, username, email, password_hash) VALUES %s ON CONFLICT (email) DO NOTHING
+    """, [(f"00000000-0000-4000-8000-{i:012d}", f"loadtest{i}", USER_EMAIL.format(i), password_hash)
+          for i in range(users)])
+
+
+class _Client:
+    """Minimal keep-alive HTTP client that tracks the Flask session cookie and never follows redirects."""
+
+    def __init__(self, host, port):
+        self.conn = http.client.HTTPConnection(host, port, timeout=120)
+        self.cookie = None
+
+    def request(self, method, path, form=None, json_body=None):
+        headers = {}
+        body = None
+        if form is not None:
+            body = urlencode(form, doseq=True)
+            headers["Content-Type"] = "application/x-www-form-urlencoded"
+        elif json_body is not None:
+            body = json.dumps(json_body)
+            headers["Content-Type"] = "application/json"
+        if self.cookie:
+            headers["Cookie"] = self.cookie
+
+        start = time.perf_counter()
+        self.conn.request(method, path, body=body, headers=headers)
+        resp = self.conn.getresponse()
+        content = resp.read()
+        elapsed = time.perf_counter() - start
+
+        for header in resp.headers.get_all("Set-Cookie") or []:
+            for name, morsel in SimpleCookie(header).items():
+                if name == "session":
+                    self.cookie = f"session={morsel.value}" if morsel.value else None
+        return resp.status, urlsplit(resp.getheader("Location") or "").path, content, elapsed
+
+    def close(self):
+        self.conn.close()
+
+
+class _Recorder:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self.quizzes = 0
+
+    def add(self, local):
+        with self._lock:
+            for endpoint, values in local.latencies.items():
+                self.latencies[endpoint].extend(values)
+            for endpoint, count in local.errors.items():
+                self.errors[endpoint] += count
+            self.quizzes += local.quizzes
+
+
+class _FlowError(Exception):
+    pass
+
+
+def _call(client, recorder, method, path, form=None, json_body=None, expect=(302,)):
+    status, location, content, elapsed = client.request(method, path, form, json_body)
+    endpoint = f"{method} {path}"
+    recorder.latencies[endpoint].append(elapsed * 1000)
+    if status not in expect:
+        recorder.errors[endpoint] += 1
+        raise _FlowError(f"{endpoint} returned {status}")
+    return status, location, content
+
+
+def _current_question(client, recorder):
+    """Id of the question GET /question shows, or None once the quiz is over."""
+    status, location, content = _call(client, recorder, "GET", "/question", expect=(200, 302))
+    if status == 302:
+        if location == "/finish":
+            return None
+        raise _FlowError(f"/question redirected to {location}")
+    match = QUESTION_ID_RE.search(content)
+    if not match:
+        raise _FlowError("/question page has no question_id")
+    return int(match.group(1))
+
+
+def _answer(question_id, rng):
+    answer = {"question_id": question_id, "bof_answer": rng.choice(BOF_LABELS)}
+    answer.update({f"tf_{n}": rng.choice(("true", "false")) for n in range(1, TF_STATEMENTS + 1)})
+    return answer
+
+
+def _answer_via_form(client, recorder, question_id, rng):
+    _, location, _ = _call(client, recorder, "POST", "/submit_answer", _answer(question_id, rng))
+    return None if location == "/finish" else _current_question(client, recorder)
+
+
+def _answer_via_api(client, recorder, question_id, rng):
+    _, _, content = _call(client, recorder, "POST", "/api/quiz/answer", json_body=_answer(question_id, rng),
+                          expect=(200, 409))
+    data = json.loads(content)
+    if data["status"] == "finished":
+        return None
+    if data["status"] == "conflict":
+        # The page reloads /question when it is out of sync; so does the harness.
+        recorder.errors["POST /api/quiz/answer"] += 1
+        return _current_question(client, recorder)
+    return data["questions"][0]["id"]
+
+
+ANSWER_FLOWS = {"api": _answer_via_api, "form": _answer_via_form}
+
+
+def _run_quiz(client, recorder, sections, questions, answer_via, rng):
+    _, location, _ = _call(client, recorder, "POST", "/start", {
+        "question_type": "both", "num_questions": questions, "time_limit": 3600, "sections": sections,
+    })
+    if location != "/question":
+        raise _FlowError(f"/start redirected to {location}")
+
+    question_id = _current_question(client, recorder)
+    # A bounded loop: a skipped malformed question may end the quiz early.
+    for _ in range(questions + 5):
+        if question_id is None:
+            break
+        question_id = answer_via(client, recorder, question_id, rng)
+    else:
+        raise _FlowError("quiz did not finish")
+
+    _call(client, recorder, "GET", "/finish")
+    _call(client, recorder, "GET", "/results", expect=(200,))
+
+
+def _user(index, host, port, sections, questions, rounds, answer_via, recorder, barrier):
+    local = _Recorder()
+    rng = random.Random(index)
+    client = _Client(host, port)
+    try:
+        barrier.wait()
+        _, location, _ = _call(client, local, "POST", "/login",
+                         {"email": USER_EMAIL.format(index), "password": USER_PASSWORD})
+        if location != "/dashboard":
+            raise _FlowError(f"login for {USER_EMAIL.format(index)} redirected to {location}")
+        for _ in range(rounds):
+            _run_quiz(client, local, sections, questions, answer_via, rng)
+            local.quizzes += 1
+    except (_FlowError, OSError, http.client.HTTPException) as e:
+        print(f"user {index}: {e}", file=sys.stderr)
+    finally:
+        client.close()
+        recorder.add(local)
+
+
+def _serve_in_process():
+    from werkzeug.serving import make_server
+
+    from main import app
+
+    # Per-request access logging would dominate the measurement.
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _percentile(values, q):
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="target server, e.g. http://127.0.0.1:8000 (default: serve the app in-process)")
+    parser.add_argument("--users", type=int, default=20, help="concurrent simulated users")
+    parser.add_argument("--questions", type=int, default=20, help="questions per quiz")
+    parser.add_argument("--rounds", type=int, default=1, help="quizzes per user")
+    parser.add_argument("--answer-via", choices=sorted(ANSWER_FLOWS), default="api",
+                        help="answer through the page's JSON API or the no-JS form")
+    parser.add_argument("--setup-schema", action="store_true", help="create tables and apply migrations first")
+    parser.add_argument("--seed", action="store_true", help="insert the synthetic bank and load users first")
+    parser.add_argument("--sections", type=int, default=22, help="synthetic sections to seed")
+    parser.add_argument("--bof", type=int, default=40, help="BOF questions per seeded section")
+    parser.add_argument("--tf", type=int, default=40, help="TF questions per seeded section")
+    parser.add_argument("--random-seed", type=int, default=1)
+    args = parser.parse_args()
+
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        if args.setup_schema:
+            setup_schema(cur)
+        if args.seed:
+            created = seed_bank(cur, args.sections, args.bof, args.tf, random.Random(args.random_seed))
+            seed_users(cur, args.users)
+            print(f"seeded {created} sections, {args.users} users")
+        conn.commit()
+        cur.execute("SELECT section_name FROM sections ORDER BY id")
+        sections = [r["section_name"] for r in cur.fetchall()]
+    finally:
+        conn.close()
+    if not sections:
+        sys.exit("No sections in the configured database; run with --setup-schema --seed on a scratch database.")
+
+    server = None
+    if args.url:
+        target = urlsplit(args.url)
+        host, port = target.hostname, target.port or 80
+    else:
+        server = _serve_in_process()
+        host, port = "127.0.0.1", server.server_port
+
+    recorder = _Recorder()
+    barrier = threading.Barrier(args.users + 1)
+    threads = [
+        threading.Thread(target=_user, args=(i, host, port, sections, args.questions, args.rounds,
+                                             ANSWER_FLOWS[args.answer_via], recorder, barrier))
+        for i in range(args.users)
+    ]
+    for t in threads:
+        t.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    if server:
+        server.shutdown()
+
+    total = sum(len(v) for v in recorder.latencies.values())
+    print(f"{args.users} users x {args.rounds} quizzes x {args.questions} questions in {elapsed:.1f}s")
+    print(f"{total / elapsed:.1f} requests/s, {recorder.quizzes / elapsed:.2f} quizzes/s, "
+          f"{sum(recorder.errors.values())} errors")
+    print(f"{'endpoint':<22}  {'count':>6}  {'p50':>9}  {'p95':>9}  {'p99':>9}  {'max':>9}  {'errors':>6}")
+    for endpoint in sorted(recorder.latencies):
+        values = sorted(recorder.latencies[endpoint])
+        print(f"{endpoint:<22}  {len(values):>6}  {_percentile(values, 0.50):>7.1f}ms  "
+              f"{_percentile(values, 0.95):>7.1f}ms  {_percentile(values, 0.99):>7.1f}ms  "
+              f"{values[-1]:>7.1f}ms  {recorder.errors[endpoint]:>6}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+-- Base tables for a scratch benchmark database, covering the columns the
+-- routes read and write. Apply migrations/*.sql on top (load_quiz.py
+-- --setup-schema does both). Not meant for production databases.
+
+CREATE TABLE IF NOT EXISTS users (
+    id UUID PRIMARY KEY,
+    username TEXT NOT NULL,
+    email TEXT NOT NULL UNIQUE,
+    password_hash TEXT NOT NULL,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    last_login TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS sections (
+    id SERIAL PRIMARY KEY,
+    section_name TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS questions (
+    id SERIAL PRIMARY KEY,
+    section TEXT NOT NULL,
+    question_type TEXT NOT NULL CHECK (question_type IN ('BOF', 'TF')),
+    question_text TEXT NOT NULL,
+    explanation TEXT
+);
+
+CREATE TABLE IF NOT EXISTS options (
+    id SERIAL PRIMARY KEY,
+    question_id INTEGER NOT NULL REFERENCES questions (id) ON DELETE CASCADE,
+    option_label TEXT NOT NULL,
+    option_text TEXT NOT NULL,
+    is_correct BOOLEAN NOT NULL DEFAULT FALSE
+);
+CREATE INDEX IF NOT EXISTS options_question_id_idx ON options (question_id);
+
+CREATE TABLE IF NOT EXISTS tf_statements (
+    id SERIAL PRIMARY KEY,
+    question_id INTEGER NOT NULL REFERENCES questions (id) ON DELETE CASCADE,
+    statement_number INTEGER NOT NULL,
+    statement_text TEXT NOT NULL,
+    is_true BOOLEAN NOT NULL
+);
+CREATE INDEX IF NOT EXISTS tf_statements_question_id_idx ON tf_statements (question_id);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id UUID PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    section_filter TEXT,
+    total_questions INTEGER NOT NULL DEFAULT 0,
+    bof_count INTEGER NOT NULL DEFAULT 0,
+    tf_count INTEGER NOT NULL DEFAULT 0,
+    time_limit_seconds INTEGER NOT NULL DEFAULT 3600,
+    started_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    completed BOOLEAN NOT NULL DEFAULT FALSE,
+    completed_at TIMESTAMPTZ,
+    score NUMERIC,
+    total_score NUMERIC,
+    percentage NUMERIC
+);
+CREATE INDEX IF NOT EXISTS sessions_user_completed_idx ON sessions (user_id, completed_at);
+
+CREATE TABLE IF NOT EXISTS session_questions (
+    id SERIAL PRIMARY KEY,
+    session_id UUID NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    question_id INTEGER NOT NULL REFERENCES questions (id),
+    question_order INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS session_questions_session_idx ON session_questions (session_id, question_order);
+
+CREATE TABLE IF NOT EXISTS attempts (
+    id SERIAL PRIMARY KEY,
+    session_id UUID NOT NULL REFERENCES sessions (id) ON DELETE CASCADE,
+    user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    question_id INTEGER NOT NULL REFERENCES questions (id),
+    question_type TEXT,
+    bof_answer TEXT,
+    tf_answers BOOLEAN[],
+    is_correct BOOLEAN NOT NULL DEFAULT FALSE,
+    marks_obtained NUMERIC NOT NULL DEFAULT 0,
+    answered_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+CREATE INDEX IF NOT EXISTS attempts_question_idx ON attempts (question_id);
+
+CREATE TABLE IF NOT EXISTS section_progress (
+    id SERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    section TEXT NOT NULL,
+    questions_attempted INTEGER NOT NULL DEFAULT 0,
+    questions_correct INTEGER NOT NULL DEFAULT 0,
+    best_score_percentage NUMERIC NOT NULL DEFAULT 0,
+    last_attempted TIMESTAMPTZ
+);
+
+CREATE TABLE IF NOT EXISTS bookmarks (
+    id SERIAL PRIMARY KEY,
+    user_id UUID NOT NULL REFERENCES users (id) ON DELETE CASCADE,
+    question_id INTEGER NOT NULL REFERENCES questions (id) ON DELETE CASCADE,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    UNIQUE (user_id, question_id)
+);
@@ -1,9 +1,10 @@
 import os
 from dotenv import load_dotenv
 import psycopg2
-from psycopg2 import pool
-from psycopg2.extras import RealDictCursor
 from contextlib import contextmanager
+from db_pool import BlockingConnectionPool
+from pool_metrics import PoolMetrics
+from query_trace import TracingCursor
 
 load_dotenv()
 
@@ -16,6 +17,51 @@ SECRET_KEY = os.environ.get("SECRET_KEY", "nelson2024xyz")
 # Connection pool configuration
 MIN_CONN = int(os.environ.get("DB_MIN_CONN", "2"))
 MAX_CONN = int(os.environ.get("DB_MAX_CONN", "10"))
+# Seconds a request waits for a free connection before giving up
+POOL_TIMEOUT = float(os.environ.get("DB_POOL_TIMEOUT", "10"))
+# Connections are recycled after this many seconds
+POOL_MAX_LIFETIME = float(os.environ.get("DB_POOL_MAX_LIFETIME", "1800"))
+# Connections idle at least this many seconds are pinged on checkout
+POOL_CHECK_IDLE = float(os.environ.get("DB_POOL_CHECK_IDLE", "5"))
+# Connections held longer than this many seconds are reported as leaked
+LEAK_THRESHOLD = float(os.environ.get("DB_LEAK_THRESHOLD", "30"))
+# Optional bearer token required by /metrics
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN", "")
+
+# Query tracing: statements slower than SLOW_QUERY_MS are written to the slow-query
+# log (SLOW_QUERY_LOG file if set, otherwise the "slow_query" logger)
+SLOW_QUERY_MS = float(os.environ.get("SLOW_QUERY_MS", "200"))
+SLOW_QUERY_LOG = os.environ.get("SLOW_QUERY_LOG", "")
+
+# Question bank cache configuration
+QUESTION_BANK_CACHE_SIZE = int(os.environ.get("QUESTION_BANK_CACHE_SIZE", "5000"))
+QUESTION_BANK_CHECK_INTERVAL = int(os.environ.get("QUESTION_BANK_CHECK_INTERVAL", "60"))
+
+# Formatted explanations kept in memory (LRU, one entry per question)
+EXPLANATION_CACHE_SIZE = int(os.environ.get("EXPLANATION_CACHE_SIZE", "5000"))
+
+# Results payloads of completed sessions kept in memory (LRU, per bank version)
+RESULTS_CACHE_SIZE = int(os.environ.get("RESULTS_CACHE_SIZE", "500"))
+
+# Dashboard statistics: "summary" reads user_section_stats, "live" aggregates attempts in SQL
+DASHBOARD_STATS_SOURCE = os.environ.get("DASHBOARD_STATS_SOURCE", "summary").lower()
+
+# Write-behind answer queue (opt-in): answers are acknowledged once stored in a
+# local SQLite WAL file and flushed to PostgreSQL in batches.
+ANSWER_WRITE_BEHIND = os.environ.get("ANSWER_WRITE_BEHIND", "").lower() == "true"
+ANSWER_QUEUE_PATH = os.environ.get("ANSWER_QUEUE_PATH", "answer_queue.sqlite3")
+ANSWER_QUEUE_BATCH_SIZE = int(os.environ.get("ANSWER_QUEUE_BATCH_SIZE", "500"))
+ANSWER_QUEUE_FLUSH_INTERVAL = float(os.environ.get("ANSWER_QUEUE_FLUSH_INTERVAL", "0.5"))
+
+# Quiz question lists kept server-side (the cookie holds quiz_session_id and the
+# current position). The default in-process store is per worker; set
+# QUIZ_PROGRESS_REDIS_URL to share it between processes. Either way a miss is
+# rebuilt from the database.
+QUIZ_PROGRESS_REDIS_URL = os.environ.get("QUIZ_PROGRESS_REDIS_URL", "")
+QUIZ_PROGRESS_CACHE_SIZE = int(os.environ.get("QUIZ_PROGRESS_CACHE_SIZE", "10000"))
+QUIZ_PROGRESS_TTL = int(os.environ.get("QUIZ_PROGRESS_TTL", "43200"))
+
+pool_metrics = PoolMetrics(LEAK_THRESHOLD)
 
 # Create connection pool
 _db_pool = None
@@ -25,14 +71,18 @@ def init_db_pool():
     global _db_pool
     if _db_pool is None:
         try:
-            _db_pool = psycopg2.pool.ThreadedConnectionPool(
+            _db_pool = BlockingConnectionPool(
                 MIN_CONN,
                 MAX_CONN,
+                timeout=POOL_TIMEOUT,
+                max_lifetime=POOL_MAX_LIFETIME,
+                check_idle_after=POOL_CHECK_IDLE,
+                metrics=pool_metrics,
                 host=DB_HOST,
                 database=DB_NAME,
                 user=DB_USER,
                 password=DB_PASSWORD,
-                cursor_factory=RealDictCursor
+                cursor_factory=TracingCursor
             )
         except psycopg2.Error as e:
             raise RuntimeError(f"Failed to create database connection pool: {e}")
@@ -40,9 +90,10 @@ def init_db_pool():
 
 def get_db():
     """
-    Get a database connection from the pool.
+    Get a database connection from the pool, waiting up to DB_POOL_TIMEOUT
+    seconds (in arrival order) when every connection is in use.
     Returns a connection object.
-    Raises RuntimeError if connection fails.
+    Raises RuntimeError if connection fails or the wait times out.
     """
     pool = init_db_pool()
     try:
@@ -79,6 +130,11 @@ def get_db_connection():
             pool = init_db_pool()
             pool.putconn(conn)
 
+def render_pool_metrics():
+    """Pool metrics in Prometheus text format."""
+    idle = _db_pool.idle_count() if _db_pool else 0
+    return pool_metrics.render(idle=idle, max_size=MAX_CONN)
+
 def close_db_pool():
     """Close all connections in the pool. Call this on application shutdown."""
     global _db_pool
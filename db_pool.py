@@ -0,0 +1,191 @@
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import PoolError
+
+
+class PoolTimeout(PoolError):
+    """No connection became available within the checkout timeout."""
+
+
+class _Waiter:
+    __slots__ = ("event", "conn", "may_connect")
+
+    def __init__(self):
+        self.event = threading.Event()
+        self.conn = None
+        self.may_connect = False
+
+
+class BlockingConnectionPool:
+    """
+    Thread-safe PostgreSQL connection pool that queues instead of failing.
+
+    - getconn() blocks for up to `timeout` seconds when all `maxconn`
+      connections are in use. Waiters are served strictly first come, first
+      served: a returned connection (or a freed slot) is handed directly to
+      the oldest waiter.
+    - A connection idle for `check_idle_after` seconds or more is pinged on
+      checkout. Dead ones, for example after a database restart, are dropped
+      and replaced transparently.
+    - Connections older than `max_lifetime` seconds are closed when returned
+      or checked out, so they get recycled.
+
+    Checkouts and returns are reported to `metrics` (see pool_metrics).
+    Exposes the getconn / putconn / closeall interface of psycopg2's pools.
+    """
+
+    def __init__(self, minconn, maxconn, timeout, max_lifetime, check_idle_after, metrics=None, **kwargs):
+        self.minconn = minconn
+        self.maxconn = maxconn
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.check_idle_after = check_idle_after
+        self.metrics = metrics
+        self.closed = False
+        self._kwargs = kwargs
+        self._lock = threading.Lock()
+        self._idle = deque()
+        self._born = {}
+        self._waiters = deque()
+        self._size = 0
+
+        for _ in range(minconn):
+            self._size += 1
+            self._idle.append((self._connect(), time.monotonic()))
+
+    def _connect(self):
+        conn = psycopg2.connect(**self._kwargs)
+        self._born[id(conn)] = time.monotonic()
+        return conn
+
+    def _expired(self, conn):
+        return time.monotonic() - self._born.get(id(conn), 0) > self.max_lifetime
+
+    def _usable(self, conn, returned_at):
+        if conn.closed or self._expired(conn):
+            return False
+        if time.monotonic() - returned_at >= self.check_idle_after:
+            try:
+                cur = conn.cursor()
+                cur.execute("SELECT 1")
+                cur.close()
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+        return True
+
+    def _release_slot(self):
+        """A connection was closed: let the oldest waiter open a new one, or shrink."""
+        with self._lock:
+            if self._waiters and not self.closed:
+                waiter = self._waiters.popleft()
+                waiter.may_connect = True
+                waiter.event.set()
+            else:
+                self._size -= 1
+
+    def _discard(self, conn):
+        self._born.pop(id(conn), None)
+        try:
+            conn.close()
+        except Exception:
+            pass
+        self._release_slot()
+
+    def _acquire(self, deadline):
+        """Return (conn, returned_at, may_connect) or raise PoolTimeout."""
+        with self._lock:
+            if self.closed:
+                raise PoolError("connection pool is closed")
+            # Only take the fast path when nobody is queued, to keep FIFO order.
+            if not self._waiters:
+                if self._idle:
+                    conn, returned_at = self._idle.pop()
+                    return conn, returned_at, False
+                if self._size < self.maxconn:
+                    self._size += 1
+                    return None, None, True
+            waiter = _Waiter()
+            self._waiters.append(waiter)
+
+        if not waiter.event.wait(max(0.0, deadline - time.monotonic())):
+            with self._lock:
+                if not waiter.event.is_set():
+                    self._waiters.remove(waiter)
+                    if self.metrics:
+                        self.metrics.on_exhausted()
+                    raise PoolTimeout(f"Timed out after {self.timeout}s waiting for a database connection")
+
+        if waiter.conn is None and not waiter.may_connect:
+            raise PoolError("connection pool is closed")
+        # Handed over straight from putconn(): no need to ping it again.
+        return waiter.conn, time.monotonic(), waiter.may_connect
+
+    def getconn(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+        while True:
+            conn, returned_at, may_connect = self._acquire(deadline)
+            if may_connect:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    self._release_slot()
+                    raise
+            elif not self._usable(conn, returned_at):
+                self._discard(conn)
+                continue
+
+            if self.metrics:
+                self.metrics.on_checkout(conn, time.monotonic() - started)
+            return conn
+
+    def putconn(self, conn, key=None, close=False):
+        if self.metrics:
+            self.metrics.on_checkin(conn)
+
+        if not close and not conn.closed:
+            status = conn.info.transaction_status
+            if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                close = True
+            elif status != extensions.TRANSACTION_STATUS_IDLE:
+                try:
+                    conn.rollback()
+                except psycopg2.Error:
+                    close = True
+
+        if close or conn.closed or self.closed or self._expired(conn):
+            self._discard(conn)
+            return
+
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter.conn = conn
+                waiter.event.set()
+                return
+            self._idle.append((conn, time.monotonic()))
+
+    def idle_count(self):
+        return len(self._idle)
+
+    def closeall(self):
+        with self._lock:
+            self.closed = True
+            idle = list(self._idle)
+            self._idle.clear()
+            self._size -= len(idle)
+            waiters = list(self._waiters)
+            self._waiters.clear()
+        for conn, _ in idle:
+            self._born.pop(id(conn), None)
+            try:
+                conn.close()
+            except Exception:
+                pass
+        for waiter in waiters:
+            waiter.event.set()
@@ -1,7 +1,12 @@
 import os
 import atexit
+from functools import lru_cache
 from flask import Flask
-from config import SECRET_KEY, close_db_pool
+from config import SECRET_KEY, ANSWER_WRITE_BEHIND, SLOW_QUERY_MS, SLOW_QUERY_LOG, close_db_pool
+from query_trace import init_app as init_query_trace
+from answer_queue import answer_queue
+from user_stats import rebuild_stats_command
+from question_bank import bump_bank_version_command
 
 app = Flask(__name__)
 app.secret_key = SECRET_KEY
@@ -9,18 +14,51 @@ app.config["SESSION_COOKIE_SAMESITE"] = "Lax"
 app.config["SESSION_COOKIE_HTTPONLY"] = True
 if os.environ.get("SESSION_COOKIE_SECURE", "").lower() == "true":
     app.config["SESSION_COOKIE_SECURE"] = True
+# Static URLs carry a version query string (see static_cache_buster), so they can be cached for long.
+app.config["SEND_FILE_MAX_AGE_DEFAULT"] = int(os.environ.get("STATIC_MAX_AGE", str(365 * 24 * 3600)))
+
+
+@lru_cache(maxsize=None)
+def _static_version(filename):
+    try:
+        return str(int(os.path.getmtime(os.path.join(app.static_folder, filename))))
+    except OSError:
+        return None
+
+
+@app.url_defaults
+def static_cache_buster(endpoint, values):
+    if endpoint == "static" and "filename" in values and "v" not in values:
+        version = _static_version(values["filename"])
+        if version:
+            values["v"] = version
 
 from routes.auth import auth
 from routes.quiz import quiz
 from routes.dashboard import dashboard
+from routes.metrics import metrics
+from routes.export import export
 
 app.register_blueprint(auth)
 app.register_blueprint(quiz)
 app.register_blueprint(dashboard)
+app.register_blueprint(metrics)
+app.register_blueprint(export)
+
+init_query_trace(app, SLOW_QUERY_MS, SLOW_QUERY_LOG)
+
+app.cli.add_command(rebuild_stats_command)
+app.cli.add_command(bump_bank_version_command)
 
 # Register cleanup function to close database pool on shutdown
 atexit.register(close_db_pool)
 
+# Write-behind answers: replay anything a crash left queued, then flush in the
+# background. Runs per worker process (do not combine with gunicorn --preload).
+if ANSWER_WRITE_BEHIND:
+    answer_queue.start()
+    atexit.register(answer_queue.stop)
+
 if __name__ == "__main__":
     debug_mode = os.environ.get("FLASK_DEBUG", "False").lower() == "true"
     host = os.environ.get("FLASK_HOST", "127.0.0.1")
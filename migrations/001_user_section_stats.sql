@@ -0,0 +1,27 @@
+-- Per-user, per-section dashboard aggregates maintained by quiz.finish().
+-- user_id columns match users.id (UUID). Populate existing history with:
+--     flask --app main rebuild-stats
+
+CREATE TABLE IF NOT EXISTS user_section_stats (
+    user_id UUID NOT NULL,
+    section TEXT NOT NULL,
+    questions_attempted INTEGER NOT NULL DEFAULT 0,
+    questions_correct INTEGER NOT NULL DEFAULT 0,
+    marks_sum NUMERIC NOT NULL DEFAULT 0,
+    unique_questions_covered INTEGER NOT NULL DEFAULT 0,
+    bof_attempted INTEGER NOT NULL DEFAULT 0,
+    bof_correct INTEGER NOT NULL DEFAULT 0,
+    tf_attempted INTEGER NOT NULL DEFAULT 0,
+    tf_marks_sum NUMERIC NOT NULL DEFAULT 0,
+    last_attempted TIMESTAMPTZ,
+    PRIMARY KEY (user_id, section)
+);
+
+-- One row per question a user has answered in a completed session; drives the
+-- incremental unique-coverage counts above.
+CREATE TABLE IF NOT EXISTS user_questions_seen (
+    user_id UUID NOT NULL,
+    question_id INTEGER NOT NULL,
+    section TEXT NOT NULL,
+    PRIMARY KEY (user_id, question_id)
+);
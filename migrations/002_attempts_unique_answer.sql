@@ -0,0 +1,12 @@
+-- One answer per question per session; lets submit_answer() insert with
+-- ON CONFLICT DO NOTHING instead of checking for a duplicate first.
+
+-- Keep the earliest attempt where double-submits slipped through before.
+DELETE FROM attempts a
+USING attempts b
+WHERE a.session_id = b.session_id
+  AND a.question_id = b.question_id
+  AND a.id > b.id;
+
+CREATE UNIQUE INDEX IF NOT EXISTS attempts_session_question_key
+    ON attempts (session_id, question_id);
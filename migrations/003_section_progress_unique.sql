@@ -0,0 +1,27 @@
+-- One section_progress row per (user, section) so quiz.finish() can upsert
+-- all sections with INSERT ... ON CONFLICT.
+
+-- Merge rows duplicated by the old read-then-write race.
+CREATE TEMP TABLE section_progress_merged AS
+SELECT user_id,
+       section,
+       SUM(questions_attempted) AS questions_attempted,
+       SUM(questions_correct) AS questions_correct,
+       MAX(best_score_percentage) AS best_score_percentage,
+       MAX(last_attempted) AS last_attempted
+FROM section_progress
+GROUP BY user_id, section
+HAVING COUNT(*) > 1;
+
+DELETE FROM section_progress sp
+USING section_progress_merged m
+WHERE sp.user_id = m.user_id AND sp.section = m.section;
+
+INSERT INTO section_progress (user_id, section, questions_attempted, questions_correct, best_score_percentage, last_attempted)
+SELECT user_id, section, questions_attempted, questions_correct, best_score_percentage, last_attempted
+FROM section_progress_merged;
+
+DROP TABLE section_progress_merged;
+
+CREATE UNIQUE INDEX IF NOT EXISTS section_progress_user_section_key
+    ON section_progress (user_id, section);
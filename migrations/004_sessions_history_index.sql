@@ -0,0 +1,6 @@
+-- Session history on the dashboard is paged by (completed_at, id), newest
+-- first; this serves each page and the score summary from one index range.
+
+CREATE INDEX IF NOT EXISTS sessions_user_history_idx
+    ON sessions (user_id, completed_at DESC, id DESC)
+    WHERE completed = TRUE;
@@ -0,0 +1,4 @@
+-- The bookmarks page is paged newest first by bookmarks.id per user.
+
+CREATE INDEX IF NOT EXISTS bookmarks_user_id_idx
+    ON bookmarks (user_id, id DESC);
@@ -0,0 +1,36 @@
+-- Question bank version read by QuestionBankCache. Any insert, update, delete
+-- or truncate on questions / options / tf_statements bumps it (once per
+-- statement), so in-place corrections to an answer key or explanation reach
+-- every worker within QUESTION_BANK_CHECK_INTERVAL. Changes made with
+-- triggers disabled can be announced with:
+--     flask --app main bump-bank-version
+
+CREATE TABLE IF NOT EXISTS bank_version (
+    id BOOLEAN PRIMARY KEY DEFAULT TRUE CHECK (id),
+    version BIGINT NOT NULL DEFAULT 1
+);
+
+INSERT INTO bank_version (id, version) VALUES (TRUE, 1)
+ON CONFLICT (id) DO NOTHING;
+
+CREATE OR REPLACE FUNCTION bump_bank_version() RETURNS trigger AS $$
+BEGIN
+    UPDATE bank_version SET version = version + 1;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS questions_bump_bank_version ON questions;
+CREATE TRIGGER questions_bump_bank_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON questions
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_bank_version();
+
+DROP TRIGGER IF EXISTS options_bump_bank_version ON options;
+CREATE TRIGGER options_bump_bank_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON options
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_bank_version();
+
+DROP TRIGGER IF EXISTS tf_statements_bump_bank_version ON tf_statements;
+CREATE TRIGGER tf_statements_bump_bank_version
+    AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON tf_statements
+    FOR EACH STATEMENT EXECUTE FUNCTION bump_bank_version();
@@ -0,0 +1,145 @@
+import logging
+import threading
+import time
+import traceback
+from collections import defaultdict
+
+from flask import has_request_context, request
+
+logger = logging.getLogger(__name__)
+
+# Histogram buckets in seconds for checkout wait and hold times.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class _Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+
+    def render(self, name, labels=""):
+        sep = "," if labels else ""
+        lines = []
+        for bound, count in zip(BUCKETS, self.counts):
+            lines.append(f'{name}_bucket{{{labels}{sep}le="{bound}"}} {count}')
+        lines.append(f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.total}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum:.6f}")
+        lines.append(f"{name}_count{suffix} {self.total}")
+        return lines
+
+
+class PoolMetrics:
+    """
+    Connection pool instrumentation: checkout wait, hold time per route,
+    exhaustion count and long-held ("leaked") connections with the stack
+    that acquired them. Rendered in Prometheus text format by /metrics.
+    """
+
+    def __init__(self, leak_threshold):
+        self.leak_threshold = leak_threshold
+        self._lock = threading.Lock()
+        self._wait = _Histogram()
+        self._hold = defaultdict(_Histogram)
+        self._checked_out = {}
+        self._reported_leaks = set()
+        self.checkouts = 0
+        self.exhausted = 0
+
+    @staticmethod
+    def _route():
+        if has_request_context():
+            return request.endpoint or "-"
+        return "-"
+
+    def on_checkout(self, conn, wait_seconds):
+        info = {
+            "acquired_at": time.monotonic(),
+            "route": self._route(),
+            "stack": traceback.extract_stack(limit=12)[:-2],
+        }
+        with self._lock:
+            self.checkouts += 1
+            self._wait.observe(wait_seconds)
+            self._checked_out[id(conn)] = info
+        self.report_leaks()
+
+    def on_checkin(self, conn):
+        with self._lock:
+            info = self._checked_out.pop(id(conn), None)
+            self._reported_leaks.discard(id(conn))
+            if info:
+                self._hold[info["route"]].observe(time.monotonic() - info["acquired_at"])
+
+    def on_exhausted(self):
+        with self._lock:
+            self.exhausted += 1
+
+    def in_use(self):
+        with self._lock:
+            return len(self._checked_out)
+
+    def leaked(self):
+        """Checked-out connections held longer than the leak threshold."""
+        now = time.monotonic()
+        with self._lock:
+            return [
+                (key, info, now - info["acquired_at"])
+                for key, info in self._checked_out.items()
+                if now - info["acquired_at"] > self.leak_threshold
+            ]
+
+    def report_leaks(self):
+        for key, info, held in self.leaked():
+            if key in self._reported_leaks:
+                continue
+            self._reported_leaks.add(key)
+            logger.warning(
+                "Database connection held for %.1fs by %s, acquired at:\n%s",
+                held, info["route"], "".join(traceback.format_list(info["stack"]))
+            )
+
+    def render(self, idle, max_size):
+        self.report_leaks()
+        leaked = self.leaked()
+        with self._lock:
+            lines = [
+                "# HELP db_pool_connections_in_use Connections currently checked out.",
+                "# TYPE db_pool_connections_in_use gauge",
+                f"db_pool_connections_in_use {len(self._checked_out)}",
+                "# HELP db_pool_connections_idle Open connections waiting in the pool.",
+                "# TYPE db_pool_connections_idle gauge",
+                f"db_pool_connections_idle {idle}",
+                "# HELP db_pool_connections_max Configured maximum pool size.",
+                "# TYPE db_pool_connections_max gauge",
+                f"db_pool_connections_max {max_size}",
+                "# HELP db_pool_checkouts_total Successful connection checkouts.",
+                "# TYPE db_pool_checkouts_total counter",
+                f"db_pool_checkouts_total {self.checkouts}",
+                "# HELP db_pool_exhausted_total Checkouts that failed because the pool was exhausted.",
+                "# TYPE db_pool_exhausted_total counter",
+                f"db_pool_exhausted_total {self.exhausted}",
+                "# HELP db_pool_leaked_connections Connections held longer than the leak threshold.",
+                "# TYPE db_pool_leaked_connections gauge",
+                f"db_pool_leaked_connections {len(leaked)}",
+                "# HELP db_pool_checkout_wait_seconds Time spent waiting for a connection.",
+                "# TYPE db_pool_checkout_wait_seconds histogram",
+            ]
+            lines.extend(self._wait.render("db_pool_checkout_wait_seconds"))
+            lines.append("# HELP db_pool_hold_seconds Time a connection was held, by route.")
+            lines.append("# TYPE db_pool_hold_seconds histogram")
+            for route in sorted(self._hold):
+                lines.extend(self._hold[route].render("db_pool_hold_seconds", f'route="{_escape_label(route)}"'))
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
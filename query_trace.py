@@ -0,0 +1,100 @@
+import heapq
+import json
+import logging
+import time
+
+from flask import g, has_request_context, request
+from psycopg2.extras import RealDictCursor
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("slow_query")
+
+# Statements slower than this (seconds) go to the slow-query log; set by init_app().
+_slow_threshold = 0.2
+SLOWEST_KEPT = 5
+
+
+def _statement_text(query):
+    if isinstance(query, bytes):
+        query = query.decode("utf-8", "replace")
+    # Log the parameterised statement, never the bound values.
+    return " ".join(str(query).split())[:1000]
+
+
+def _record(query, duration):
+    route = "-"
+    if has_request_context():
+        route = request.endpoint or "-"
+        trace = g.get("query_trace")
+        if trace is None:
+            trace = g.query_trace = {"count": 0, "total": 0.0, "slowest": []}
+        trace["count"] += 1
+        trace["total"] += duration
+        entry = (duration, trace["count"], query)
+        if len(trace["slowest"]) < SLOWEST_KEPT:
+            heapq.heappush(trace["slowest"], entry)
+        else:
+            heapq.heappushpop(trace["slowest"], entry)
+
+    if duration >= _slow_threshold:
+        slow_query_logger.warning(json.dumps({
+            "event": "slow_query",
+            "route": route,
+            "duration_ms": round(duration * 1000, 2),
+            "statement": _statement_text(query),
+        }))
+
+
+class TracingCursor(RealDictCursor):
+    """RealDictCursor that times every statement for per-request tracing."""
+
+    def execute(self, query, vars=None):
+        started = time.perf_counter()
+        try:
+            return super().execute(query, vars)
+        finally:
+            _record(query, time.perf_counter() - started)
+
+    def executemany(self, query, vars_list):
+        started = time.perf_counter()
+        try:
+            return super().executemany(query, vars_list)
+        finally:
+            _record(query, time.perf_counter() - started)
+
+
+def _add_server_timing(response):
+    trace = g.get("query_trace")
+    if not trace:
+        return response
+
+    total_ms = trace["total"] * 1000
+    response.headers.add("Server-Timing", f'db;dur={total_ms:.1f};desc="{trace["count"]} queries"')
+    if logger.isEnabledFor(logging.DEBUG):
+        slowest = sorted(trace["slowest"], reverse=True)
+        logger.debug(json.dumps({
+            "event": "request_queries",
+            "route": request.endpoint,
+            "query_count": trace["count"],
+            "db_ms": round(total_ms, 2),
+            "slowest": [
+                {"duration_ms": round(d * 1000, 2), "statement": _statement_text(q)}
+                for d, _, q in slowest
+            ],
+        }))
+    return response
+
+
+def init_app(app, slow_query_ms, log_file=""):
+    """Emit Server-Timing for DB time and configure the slow-query log."""
+    global _slow_threshold
+    _slow_threshold = slow_query_ms / 1000.0
+
+    if log_file:
+        handler = logging.FileHandler(log_file)
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        slow_query_logger.addHandler(handler)
+        slow_query_logger.setLevel(logging.WARNING)
+        slow_query_logger.propagate = False
+
+    app.after_request(_add_server_timing)
@@ -0,0 +1,257 @@
+import bisect
+import click
+import itertools
+import random
+import threading
+import time
+from collections import OrderedDict, defaultdict
+
+from config import get_db_connection, QUESTION_BANK_CACHE_SIZE, QUESTION_BANK_CHECK_INTERVAL
+
+# Bank version counter, bumped by triggers on questions / options /
+# tf_statements (migrations/006_bank_version.sql) for every change, including
+# in-place updates of answer keys and text.
+BANK_VERSION_SQL = "SELECT version FROM bank_version"
+BUMP_BANK_VERSION_SQL = "UPDATE bank_version SET version = version + 1 RETURNING version"
+
+
+def _load_questions(cur, question_ids):
+    """Load questions plus their options / TF statements with one query per table."""
+    cur.execute("SELECT * FROM questions WHERE id = ANY(%s)", (list(question_ids),))
+    entries = {}
+    for row in cur.fetchall():
+        entries[row["id"]] = {
+            "question": dict(row),
+            "options": [],
+            "tf_statements": [],
+            "correct_label": None,
+        }
+
+    bof_ids = [qid for qid, e in entries.items() if e["question"]["question_type"] == "BOF"]
+    tf_ids = [qid for qid, e in entries.items() if e["question"]["question_type"] != "BOF"]
+
+    if bof_ids:
+        cur.execute("""
+            SELECT * FROM options
+            WHERE question_id = ANY(%s)
+            ORDER BY question_id, option_label
+        """, (bof_ids,))
+        for row in cur.fetchall():
+            entry = entries[row["question_id"]]
+            entry["options"].append(dict(row))
+            if row["is_correct"] and entry["correct_label"] is None:
+                entry["correct_label"] = row["option_label"]
+
+    if tf_ids:
+        cur.execute("""
+            SELECT * FROM tf_statements
+            WHERE question_id = ANY(%s)
+            ORDER BY question_id, statement_number
+        """, (tf_ids,))
+        for row in cur.fetchall():
+            entries[row["question_id"]]["tf_statements"].append(dict(row))
+
+    return entries
+
+
+class QuestionBankCache:
+    """
+    Read-through, size-bounded LRU cache of question bank content.
+
+    Each entry holds the question row, its options or TF statements and the
+    correct BOF label, keyed by question id. Entries are shared between
+    requests and must be treated as read-only.
+
+    It also keeps an index of question ids partitioned by (section,
+    question_type) so quizzes can be drawn without querying the bank.
+
+    The cache is tagged with the bank_version counter. The version is
+    re-checked at most every `check_interval` seconds and a change drops every
+    entry, so any edit to the bank (or `flask bump-bank-version`) reaches every
+    process within that interval without a restart.
+    """
+
+    def __init__(self, max_entries, check_interval):
+        self.max_entries = max_entries
+        self.check_interval = check_interval
+        self._lock = threading.RLock()
+        self._entries = OrderedDict()
+        self._section_index = None
+        self._version = None
+        self._checked_at = 0.0
+
+    @property
+    def version(self):
+        return self._version
+
+    def invalidate(self):
+        """Drop all cached content and force a version check on next use."""
+        with self._lock:
+            self._entries.clear()
+            self._section_index = None
+            self._version = None
+            self._checked_at = 0.0
+
+    def _version_is_stale(self):
+        return self._version is None or time.monotonic() - self._checked_at >= self.check_interval
+
+    def _on_version_change(self):
+        """Drop everything derived from the old bank; called with the lock held."""
+        self._entries.clear()
+        self._section_index = None
+
+    def refresh_version(self, cur):
+        cur.execute(BANK_VERSION_SQL)
+        row = cur.fetchone()
+        version = str(row["version"])
+        with self._lock:
+            if version != self._version:
+                self._on_version_change()
+                self._version = version
+            self._checked_at = time.monotonic()
+        return version
+
+    def current_version(self, cur=None):
+        """
+        Return the bank version, re-checking it if the last check is older
+        than `check_interval`. Borrows a pooled connection only for that check.
+        """
+        if not self._version_is_stale():
+            return self._version
+
+        if cur is not None:
+            return self.refresh_version(cur)
+
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            try:
+                return self.refresh_version(cur)
+            finally:
+                cur.close()
+
+    def _lookup(self, question_ids):
+        found = {}
+        missing = []
+        with self._lock:
+            for qid in question_ids:
+                entry = self._entries.get(qid)
+                if entry is None:
+                    missing.append(qid)
+                else:
+                    self._entries.move_to_end(qid)
+                    found[qid] = entry
+        return found, missing
+
+    def _store(self, entries):
+        with self._lock:
+            for qid, entry in entries.items():
+                self._entries[qid] = entry
+                self._entries.move_to_end(qid)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _fetch(self, cur, question_ids):
+        if self._version_is_stale():
+            self.refresh_version(cur)
+        found, missing = self._lookup(question_ids)
+        if missing:
+            loaded = _load_questions(cur, missing)
+            self._store(loaded)
+            found.update(loaded)
+        return found
+
+    def get_many(self, question_ids, cur=None):
+        """
+        Return {question_id: entry} for the ids that exist in the bank.
+        Uses `cur` for misses when given, otherwise borrows a pooled
+        connection only if something has to be loaded.
+        """
+        ids = list(dict.fromkeys(question_ids))
+        if not ids:
+            return {}
+
+        if not self._version_is_stale():
+            found, missing = self._lookup(ids)
+            if not missing:
+                return found
+
+        if cur is not None:
+            return self._fetch(cur, ids)
+
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            try:
+                return self._fetch(cur, ids)
+            finally:
+                cur.close()
+
+    def get(self, question_id, cur=None):
+        return self.get_many([question_id], cur=cur).get(question_id)
+
+    def _build_section_index(self, cur):
+        if self._version_is_stale():
+            self.refresh_version(cur)
+        with self._lock:
+            if self._section_index is not None:
+                return self._section_index
+
+        cur.execute("SELECT id, section, question_type FROM questions ORDER BY id")
+        grouped = defaultdict(list)
+        for row in cur.fetchall():
+            grouped[(row["section"], row["question_type"])].append(row["id"])
+        index = {key: tuple(ids) for key, ids in grouped.items()}
+
+        with self._lock:
+            self._section_index = index
+        return index
+
+    def section_index(self, cur=None):
+        """Return {(section, question_type): tuple_of_ids}, building it on first use."""
+        with self._lock:
+            index = self._section_index
+        if index is not None and not self._version_is_stale():
+            return index
+
+        if cur is not None:
+            return self._build_section_index(cur)
+
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            try:
+                return self._build_section_index(cur)
+            finally:
+                cur.close()
+
+    def sample_ids(self, sections, question_type, k, cur=None):
+        """
+        Draw up to `k` distinct question ids of `question_type` from `sections`.
+        Samples positions across the per-section id arrays, so the cost is O(k)
+        rather than proportional to the number of matching questions.
+        """
+        index = self.section_index(cur=cur)
+        pools = [index.get((section, question_type), ()) for section in dict.fromkeys(sections)]
+        bounds = list(itertools.accumulate(len(p) for p in pools))
+        total = bounds[-1] if bounds else 0
+
+        picked = []
+        for pos in random.sample(range(total), min(k, total)):
+            pool_idx = bisect.bisect_right(bounds, pos)
+            offset = pos - (bounds[pool_idx - 1] if pool_idx else 0)
+            picked.append(pools[pool_idx][offset])
+        return picked
+
+
+question_bank = QuestionBankCache(QUESTION_BANK_CACHE_SIZE, QUESTION_BANK_CHECK_INTERVAL)
+
+
+@click.command("bump-bank-version")
+def bump_bank_version_command():
+    """Mark the question bank as changed so every process reloads its cached copy."""
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        cur.execute(BUMP_BANK_VERSION_SQL)
+        version = cur.fetchone()["version"]
+        conn.commit()
+        cur.close()
+    question_bank.invalidate()
+    click.echo(f"Question bank version is now {version}.")
@@ -0,0 +1,235 @@
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from flask import has_request_context, session
+
+from config import (
+    get_db_connection,
+    ANSWER_WRITE_BEHIND,
+    QUIZ_PROGRESS_REDIS_URL,
+    QUIZ_PROGRESS_CACHE_SIZE,
+    QUIZ_PROGRESS_TTL,
+)
+from answer_queue import answer_queue
+
+logger = logging.getLogger(__name__)
+
+# Everything needed to rebuild a quiz's progress: its ordered questions, its
+# timing and which questions already have an answer.
+LOAD_PROGRESS_SQL = """
+    SELECT
+        s.started_at,
+        s.time_limit_seconds,
+        ARRAY(
+            SELECT sq.question_id FROM session_questions sq
+            WHERE sq.session_id = s.id
+            ORDER BY sq.question_order
+        ) AS question_ids,
+        ARRAY(SELECT a.question_id FROM attempts a WHERE a.session_id = s.id) AS answered_ids
+    FROM sessions s
+    WHERE s.id = %s AND s.user_id = %s
+"""
+
+
+class LocalProgressStore:
+    """
+    In-process, size-bounded key/value store with per-key expiry. Implements
+    the get / set(ex=) / delete subset of the redis-py client used by
+    QuizProgress, so either can back it.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._data = OrderedDict()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, ex=None):
+        expires_at = time.monotonic() + ex if ex else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class SessionPosition:
+    """
+    The current question index, kept in the Flask session cookie next to
+    `quiz_session_id`. The cookie comes with every request, so whichever
+    worker serves it sees the latest position, while the server-side store
+    only holds the quiz's fixed question list.
+    """
+
+    KEY = "quiz_position"
+
+    def get(self, session_id):
+        if not has_request_context():
+            return None
+        value = session.get(self.KEY)
+        if value and value[0] == str(session_id):
+            return value[1]
+        return None
+
+    def set(self, session_id, current):
+        if has_request_context():
+            session[self.KEY] = [str(session_id), current]
+
+    def clear(self, session_id):
+        if has_request_context() and self.get(session_id) is not None:
+            session.pop(self.KEY)
+
+
+class QuizProgress:
+    """
+    Progress of in-flight quizzes, keyed by quiz session id.
+
+    Progress is a dict with the ordered `question_ids`, the `current` index,
+    `started_at` (epoch seconds) and `time_limit`. Only `current` changes
+    during a quiz; it is kept by `position` (the session cookie), the rest in
+    `store`. The store is a cache: on a miss (restart, eviction, another
+    worker) the question list is rebuilt from session_questions. Without a
+    known position, the quiz resumes after the last answered question.
+    """
+
+    def __init__(self, store, ttl, position):
+        self.store = store
+        self.ttl = ttl
+        self.position = position
+
+    @staticmethod
+    def _key(session_id):
+        return f"quiz_progress:{session_id}"
+
+    def _save(self, progress):
+        fixed = {k: v for k, v in progress.items() if k != "current"}
+        try:
+            self.store.set(self._key(progress["session_id"]), json.dumps(fixed), ex=self.ttl)
+        except Exception:
+            logger.exception("Could not save quiz progress; it will be rebuilt from the database")
+
+    def create(self, session_id, user_id, question_ids, started_at, time_limit):
+        progress = {
+            "session_id": str(session_id),
+            "user_id": str(user_id),
+            "question_ids": list(question_ids),
+            "current": 0,
+            "started_at": started_at,
+            "time_limit": time_limit,
+        }
+        self._save(progress)
+        self.position.set(session_id, 0)
+        return progress
+
+    def _load(self, cur, session_id, user_id):
+        cur.execute(LOAD_PROGRESS_SQL, (session_id, user_id))
+        row = cur.fetchone()
+        if not row or not row["question_ids"]:
+            return None
+
+        answered = set(row["answered_ids"])
+        if ANSWER_WRITE_BEHIND:
+            answered |= answer_queue.pending_question_ids(session_id)
+        question_ids = row["question_ids"]
+        # Resume after the last answered question. Questions skipped as
+        # malformed never get an attempt, so "first unanswered" would loop
+        # back to them.
+        current = max((i + 1 for i, qid in enumerate(question_ids) if qid in answered), default=0)
+
+        started_at = row["started_at"]
+        progress = {
+            "session_id": str(session_id),
+            "user_id": str(user_id),
+            "question_ids": question_ids,
+            "current": current,
+            "started_at": int(started_at.timestamp()) if started_at else None,
+            "time_limit": row["time_limit_seconds"],
+        }
+        self._save(progress)
+        return progress
+
+    def _load_with(self, session_id, user_id, cur):
+        if cur is not None:
+            return self._load(cur, session_id, user_id)
+
+        with get_db_connection() as conn:
+            cur = conn.cursor()
+            try:
+                return self._load(cur, session_id, user_id)
+            finally:
+                cur.close()
+
+    def reload(self, session_id, user_id, cur=None):
+        """
+        Rebuild progress from the database, replacing the cached copy, and
+        reset the position to just after the last answered question.
+        """
+        progress = self._load_with(session_id, user_id, cur)
+        if progress is not None:
+            self.position.set(session_id, progress["current"])
+        return progress
+
+    def get(self, session_id, user_id, cur=None):
+        """
+        Return the progress of `user_id`'s quiz `session_id`, or None if
+        there is no such quiz. Borrows a connection only on a cache miss or
+        when the position is unknown.
+        """
+        current = self.position.get(session_id)
+        if current is None:
+            return self.reload(session_id, user_id, cur=cur)
+
+        try:
+            cached = self.store.get(self._key(session_id))
+        except Exception:
+            logger.exception("Could not read quiz progress; rebuilding from the database")
+            cached = None
+
+        progress = json.loads(cached) if cached is not None else None
+        if progress is None or progress["user_id"] != str(user_id):
+            progress = self._load_with(session_id, user_id, cur)
+            if progress is None:
+                return None
+        progress["current"] = min(current, len(progress["question_ids"]))
+        return progress
+
+    def advance(self, progress, steps=1):
+        """Move past the current question (or `steps` questions)."""
+        progress["current"] += steps
+        self.position.set(progress["session_id"], progress["current"])
+
+    def discard(self, session_id):
+        self.position.clear(session_id)
+        try:
+            self.store.delete(self._key(session_id))
+        except Exception:
+            logger.exception("Could not discard quiz progress")
+
+
+def _make_store():
+    if QUIZ_PROGRESS_REDIS_URL:
+        import redis  # optional: only needed when progress is shared through Redis
+
+        return redis.Redis.from_url(QUIZ_PROGRESS_REDIS_URL)
+    return LocalProgressStore(QUIZ_PROGRESS_CACHE_SIZE)
+
+
+quiz_progress = QuizProgress(_make_store(), QUIZ_PROGRESS_TTL, SessionPosition())
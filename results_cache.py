@@ -0,0 +1,62 @@
+import threading
+from collections import OrderedDict
+
+from config import RESULTS_CACHE_SIZE
+
+
+class ResultsCache:
+    """
+    Size-bounded LRU of assembled results payloads for completed sessions.
+
+    A completed session's attempts never change, so its payload only depends
+    on the session and on the question bank content (question text, options,
+    explanations). Entries are keyed by session id and tagged with the bank
+    version they were built from; the first lookup under a new version drops
+    everything built from the old one. Entries are shared between requests and
+    must be treated as read-only.
+    """
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._version = None
+
+    def _check_version(self, version):
+        """Called with the lock held."""
+        if version != self._version:
+            self._entries.clear()
+            self._version = version
+
+    def get(self, session_id, version):
+        with self._lock:
+            self._check_version(version)
+            entry = self._entries.get(str(session_id))
+            if entry is not None:
+                self._entries.move_to_end(str(session_id))
+            return entry
+
+    def put(self, session_id, version, user_id, session_data, attempts):
+        """Store a completed session's payload; returns the new entry."""
+        entry = {
+            "user_id": str(user_id),
+            "session_data": session_data,
+            "attempts": attempts,
+            # (username, sha1 of the rendered page), set by the results view
+            "page_etag": None,
+        }
+        with self._lock:
+            self._check_version(version)
+            self._entries[str(session_id)] = entry
+            self._entries.move_to_end(str(session_id))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+
+results_cache = ResultsCache(RESULTS_CACHE_SIZE)
@@ -1,13 +1,20 @@
-from flask import Blueprint, render_template, session, redirect, url_for, abort, request
+from flask import Blueprint, Response, render_template, render_template_string, session, redirect, url_for, abort, request, jsonify
 from config import get_db, init_db_pool
+from user_stats import load_section_stats, summarize_section_stats
 from functools import wraps
-from collections import defaultdict
+from datetime import datetime, timezone
+import hashlib
 import os
 import re
+import struct
+import threading
+import uuid
+import zlib
 import html as html_escape
 
 dashboard = Blueprint("dashboard", __name__)
 STUDY_DIR = "v22"
+STUDY_TEMPLATE_ROOT = os.path.join(dashboard.root_path, "..", "templates", STUDY_DIR)
 TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.IGNORECASE | re.DOTALL)
 TITLE_PREFIX_RE = re.compile(
     r"^\s*(Nelson Pediatrics|Postgraduate Pead MCQ Exam Help Tool)\s*[—-]\s*",
@@ -24,6 +31,43 @@ STUDY_LINK_RE = re.compile(
     r'(<a[^>]*\bclass="[^"]*\bsnav-link\b[^"]*"[^>]*\bhref=")([^"]+\.html)(")',
     re.IGNORECASE
 )
+# Placeholder for the per-user nav bar inside cached study pages.
+STUDY_NAV_MARKER = "<!--study-global-nav-->"
+# filename -> rendered page halves, their deflated forms and validators
+_study_page_cache = {}
+STUDY_GZIP_LEVEL = 6
+# Fixed gzip member header: deflate, no flags, no mtime, unknown OS.
+GZIP_HEADER = b"\x1f\x8b\x08\x00\x00\x00\x00\x00\x00\xff"
+# Completed sessions per page of dashboard history
+SESSION_HISTORY_PAGE_SIZE = 20
+SESSION_HISTORY_MAX_PAGE_SIZE = 100
+
+# One page of completed sessions, newest first, strictly after the
+# (completed_at, id) keyset cursor when one is given.
+SESSION_HISTORY_SQL = """
+    SELECT id, section_filter, total_questions, percentage, completed_at
+    FROM sessions
+    WHERE user_id = %(user_id)s AND completed = TRUE
+      AND (%(after_at)s::timestamptz IS NULL OR (completed_at, id) < (%(after_at)s, %(after_id)s::uuid))
+    ORDER BY completed_at DESC, id DESC
+    LIMIT %(limit)s
+"""
+
+# Score summary over all completed sessions; unscored sessions count as 0%.
+SESSION_SUMMARY_SQL = """
+    SELECT
+        COUNT(*) AS total_sessions,
+        COALESCE(ROUND(AVG(COALESCE(percentage, 0)), 1), 0) AS avg_score,
+        COALESCE(MAX(COALESCE(percentage, 0)), 0) AS best_score,
+        COALESCE((
+            SELECT percentage FROM sessions
+            WHERE user_id = %(user_id)s AND completed = TRUE
+            ORDER BY completed_at DESC, id DESC
+            LIMIT 1
+        ), 0) AS last_attempt_score
+    FROM sessions
+    WHERE user_id = %(user_id)s AND completed = TRUE
+"""
 
 def login_required_custom(f):
     @wraps(f)
@@ -34,8 +78,51 @@ def login_required_custom(f):
     return decorated
 
 
-def _get_study_pages():
-    template_root = os.path.join(dashboard.root_path, "..", "templates", STUDY_DIR)
+def _session_history_row(row):
+    completed_at = row["completed_at"]
+    if completed_at and hasattr(completed_at, "strftime"):
+        completed_date = completed_at.strftime("%Y-%m-%d")
+    elif completed_at:
+        completed_date = str(completed_at)[:10]
+    else:
+        completed_date = "-"
+    return {
+        "id": str(row["id"]),
+        "section_filter": row["section_filter"],
+        "total_questions": row["total_questions"],
+        "percentage_value": float(row["percentage"] or 0),
+        "completed_date": completed_date,
+    }
+
+
+def _encode_history_cursor(row):
+    return f"{row['completed_at'].isoformat()}_{row['id']}"
+
+
+def _decode_history_cursor(cursor):
+    """(completed_at, id) from a cursor made by _encode_history_cursor; ValueError if malformed."""
+    completed_at, _, session_id = cursor.rpartition("_")
+    return datetime.fromisoformat(completed_at), str(uuid.UUID(session_id))
+
+
+def _load_session_history(cur, user_id, after=None, limit=SESSION_HISTORY_PAGE_SIZE):
+    """
+    One page of the user's completed sessions, newest first. Returns
+    (rows, next_cursor); next_cursor is None on the last page.
+    """
+    after_at, after_id = after if after else (None, None)
+    cur.execute(SESSION_HISTORY_SQL, {
+        "user_id": user_id,
+        "after_at": after_at,
+        "after_id": after_id,
+        "limit": limit + 1,
+    })
+    rows = cur.fetchall()
+    next_cursor = _encode_history_cursor(rows[limit - 1]) if len(rows) > limit else None
+    return [_session_history_row(r) for r in rows[:limit]], next_cursor
+
+
+def _scan_study_pages(template_root):
     pages = []
 
     if not os.path.isdir(template_root):
@@ -70,6 +157,7 @@ def _get_study_pages():
         pages.append({
             "slug": slug,
             "filename": fname,
+            "path": file_path,
             "label": label,
             "sort_num": sort_num
         })
@@ -78,9 +166,59 @@ def _get_study_pages():
     return pages
 
 
-def _apply_study_page_overrides(html):
-    username = html_escape.escape(str(session.get("username", "User")))
-    global_nav = f"""
+class StudyCatalog:
+    """
+    Index of study pages, scanned on first use and again only when the study
+    directory's mtime changes (a page added, removed or replaced) or after
+    invalidate(). Lookups are dictionary hits against an immutable snapshot.
+    """
+
+    def __init__(self, template_root):
+        self.template_root = template_root
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._dir_mtime = None
+
+    def _current_dir_mtime(self):
+        try:
+            return os.stat(self.template_root).st_mtime_ns
+        except OSError:
+            return None
+
+    def _current(self):
+        dir_mtime = self._current_dir_mtime()
+        snapshot = self._snapshot
+        if snapshot is not None and dir_mtime == self._dir_mtime:
+            return snapshot
+
+        with self._lock:
+            if self._snapshot is not None and dir_mtime == self._dir_mtime:
+                return self._snapshot
+            pages = _scan_study_pages(self.template_root)
+            by_slug = {p["slug"]: p for p in pages}
+            self._snapshot = {"pages": pages, "by_slug": by_slug, "slugs": frozenset(by_slug)}
+            self._dir_mtime = dir_mtime
+            return self._snapshot
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def pages(self):
+        return self._current()["pages"]
+
+    def get(self, slug):
+        return self._current()["by_slug"].get(slug)
+
+    def slugs(self):
+        return self._current()["slugs"]
+
+
+study_catalog = StudyCatalog(STUDY_TEMPLATE_ROOT)
+
+
+def _render_global_nav(username):
+    username = html_escape.escape(str(username))
+    return f"""
 <nav class="global-top-nav">
   <a href="/dashboard" class="global-top-brand">Postgraduate <span>Pead MCQ</span> Tool</a>
   <div class="global-top-links">
@@ -98,9 +236,13 @@ def _apply_study_page_overrides(html):
   </div>
 </nav>
 """
-    favicon_link = """
-<link rel="icon" type="image/svg+xml" href="/static/favicon-go.svg">
-<link rel="shortcut icon" href="/static/favicon-go.svg">
+
+
+def _apply_study_page_overrides(html, global_nav):
+    favicon_url = url_for("static", filename="favicon-go.svg")
+    favicon_link = f"""
+<link rel="icon" type="image/svg+xml" href="{favicon_url}">
+<link rel="shortcut icon" href="{favicon_url}">
 """
     override_css = """
 <style id="study-overrides">
@@ -287,6 +429,87 @@ def _rewrite_study_internal_links(html, available_slugs):
 
     return STUDY_LINK_RE.sub(replace_link, html)
 
+def _deflate_block(data, final):
+    """Raw deflate of `data` that can be concatenated with other such blocks."""
+    compressor = zlib.compressobj(STUDY_GZIP_LEVEL, zlib.DEFLATED, -zlib.MAX_WBITS)
+    return compressor.compress(data) + compressor.flush(zlib.Z_FINISH if final else zlib.Z_FULL_FLUSH)
+
+
+def _get_rendered_study_page(page, available_slugs):
+    """
+    Return the transformed study page split around the per-user nav bar.
+    Branding, link rewriting and overrides run once per file version; a
+    request only joins the cached halves with its own nav. Each half is also
+    kept deflated so gzip responses only compress the nav bar.
+    """
+    mtime = os.stat(page["path"]).st_mtime_ns
+    slugs_key = frozenset(available_slugs)
+
+    cached = _study_page_cache.get(page["filename"])
+    if cached and cached["mtime"] == mtime and cached["slugs"] == slugs_key:
+        return cached
+    if cached and cached["mtime"] != mtime:
+        # Edited in place: its <title> may have changed too.
+        study_catalog.invalidate()
+
+    # Rendered from the file just read, not through render_template: Jinja's
+    # compiled-template cache does not auto-reload outside debug mode and
+    # would keep serving the page as it was before the edit.
+    with open(page["path"], encoding="utf-8") as f:
+        html = render_template_string(f.read())
+    html = _sanitize_study_branding(html)
+    html = _rewrite_study_internal_links(html, available_slugs)
+    html = _apply_study_page_overrides(html, STUDY_NAV_MARKER)
+    prefix, _, suffix = html.partition(STUDY_NAV_MARKER)
+    prefix = prefix.encode("utf-8")
+    suffix = suffix.encode("utf-8")
+
+    cached = {
+        "mtime": mtime,
+        "slugs": slugs_key,
+        "prefix": prefix,
+        "suffix": suffix,
+        "prefix_deflated": _deflate_block(prefix, final=False),
+        "suffix_deflated": _deflate_block(suffix, final=True),
+        "prefix_crc": zlib.crc32(prefix),
+        "etag": hashlib.sha1(prefix + b"\0" + suffix).hexdigest()[:20],
+        "last_modified": datetime.fromtimestamp(mtime / 1e9, tz=timezone.utc),
+    }
+    _study_page_cache[page["filename"]] = cached
+    return cached
+
+
+def _study_page_response(page):
+    cached = _get_rendered_study_page(page, study_catalog.slugs())
+    nav = _render_global_nav(session.get("username", "User")).encode("utf-8")
+    use_gzip = request.accept_encodings["gzip"] > 0
+
+    # Strong ETag per representation: cached page content + this user's nav (+ encoding).
+    etag = f"{cached['etag']}-{hashlib.sha1(nav).hexdigest()[:12]}"
+    if use_gzip:
+        crc = zlib.crc32(cached["suffix"], zlib.crc32(nav, cached["prefix_crc"]))
+        size = len(cached["prefix"]) + len(nav) + len(cached["suffix"])
+        body = b"".join((
+            GZIP_HEADER,
+            cached["prefix_deflated"],
+            _deflate_block(nav, final=False),
+            cached["suffix_deflated"],
+            struct.pack("<II", crc, size & 0xFFFFFFFF),
+        ))
+        etag += "-gz"
+    else:
+        body = cached["prefix"] + nav + cached["suffix"]
+
+    response = Response(body, mimetype="text/html")
+    if use_gzip:
+        response.headers["Content-Encoding"] = "gzip"
+    response.set_etag(etag)
+    response.last_modified = cached["last_modified"]
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.update(("Accept-Encoding", "Cookie"))
+    return response.make_conditional(request)
+
+
 @dashboard.route("/dashboard")
 @login_required_custom
 def home():
@@ -297,23 +520,13 @@ def home():
         try:
             cur = conn.cursor()
 
-            # Recent completed sessions
-            cur.execute("""
-                SELECT * FROM sessions
-                WHERE user_id = %s AND completed = TRUE
-                ORDER BY completed_at DESC
-            """, (user_id,))
-            raw_sessions = cur.fetchall()
+            # First page of session history; later pages come from /api/dashboard/sessions
+            sessions_data, sessions_next = _load_session_history(cur, user_id)
+            cur.execute(SESSION_SUMMARY_SQL, {"user_id": user_id})
+            summary = cur.fetchone()
 
-            # Section progress
-            cur.execute("""
-                SELECT a.session_id, a.question_id, q.section, a.is_correct, a.marks_obtained, s.completed_at
-                FROM attempts a
-                JOIN sessions s ON a.session_id = s.id
-                JOIN questions q ON a.question_id = q.id
-                WHERE s.user_id = %s AND s.completed = TRUE
-            """, (user_id,))
-            progress_attempt_rows = cur.fetchall()
+            # Section progress and overall performance from the maintained aggregates
+            section_stats_rows = load_section_stats(cur, user_id)
 
             # Bookmarks count
             cur.execute("""
@@ -334,111 +547,37 @@ def home():
             cur.execute("SELECT COUNT(*) AS total_questions FROM questions")
             total_bank_questions = int(cur.fetchone()["total_questions"] or 0)
 
-            # Get all attempts across all completed sessions for detailed stats
-            cur.execute("""
-                SELECT a.question_id, a.is_correct, a.marks_obtained, a.question_type
-                FROM attempts a
-                JOIN sessions s ON a.session_id = s.id
-                WHERE s.user_id = %s AND s.completed = TRUE
-            """, (user_id,))
-            all_attempts = cur.fetchall()
-
             cur.close()
         finally:
             pool = init_db_pool()
             pool.putconn(conn)
 
-        sessions_data = []
-        for s in raw_sessions:
-            row = dict(s)
-            pct = float(row["percentage"] or 0)
-            completed_at = row["completed_at"]
-            if completed_at and hasattr(completed_at, "strftime"):
-                completed_date = completed_at.strftime("%Y-%m-%d")
-            elif completed_at:
-                completed_date = str(completed_at)[:10]
-            else:
-                completed_date = "-"
-            row["percentage_value"] = pct
-            row["completed_date"] = completed_date
-            sessions_data.append(row)
-
-        # Build section progress from all completed attempts so dashboard stays correct
-        # even if section_progress table is stale/missing older updates.
-        section_totals = defaultdict(lambda: {
-            "section": "",
-            "questions_attempted": 0,
-            "unique_questions_covered": 0,
-            "questions_correct": 0,
-            "average_score_percentage": 0.0,
-            "last_attempted": None
-        })
-        section_unique_questions = defaultdict(set)
-        section_marks_sum = defaultdict(float)
-
-        for row in progress_attempt_rows:
-            section = row["section"]
-            marks = float(row["marks_obtained"] or 0)
-
-            section_totals[section]["section"] = section
-            section_totals[section]["questions_attempted"] += 1
-            section_unique_questions[section].add(row["question_id"])
-            section_marks_sum[section] += marks
-            if row["is_correct"]:
-                section_totals[section]["questions_correct"] += 1
-
-            completed_at = row["completed_at"]
-            if completed_at and (
-                section_totals[section]["last_attempted"] is None
-                or completed_at > section_totals[section]["last_attempted"]
-            ):
-                section_totals[section]["last_attempted"] = completed_at
-
-        for section, seen_ids in section_unique_questions.items():
-            section_totals[section]["unique_questions_covered"] = len(seen_ids)
-            attempts = section_totals[section]["questions_attempted"]
-            avg_pct = round((section_marks_sum[section] / attempts) * 100, 2) if attempts else 0
-            section_totals[section]["average_score_percentage"] = avg_pct
-
-        progress = list(section_totals.values())
+        progress, totals = summarize_section_stats(section_stats_rows)
         progress_map = {p["section"]: p for p in progress}
         section_question_counts = {r["section"]: int(r["question_count"]) for r in section_counts_rows}
 
-        # Calculate basic stats
-        percentages = [s["percentage_value"] for s in sessions_data]
-        avg_score = round(sum(percentages) / len(percentages), 1) if percentages else 0
-        best_score = max(percentages, default=0)
-        last_attempt_score = sessions_data[0]["percentage_value"] if sessions_data else 0
-
-        # Calculate detailed performance stats
-        total_attempts = len(all_attempts)
-        total_correct = sum(1 for a in all_attempts if a["is_correct"])
+        # Detailed performance stats
+        total_attempts = totals["total_attempts"]
+        total_correct = totals["total_correct"]
         total_wrong = total_attempts - total_correct
-        total_marks = sum(float(a["marks_obtained"] or 0) for a in all_attempts)
-        unique_questions_covered = len({a["question_id"] for a in all_attempts})
+        unique_questions_covered = totals["unique_questions_covered"]
         overall_coverage_pct = round((unique_questions_covered / total_bank_questions) * 100, 1) if total_bank_questions > 0 else 0
 
-        # BOF vs T/F breakdown
-        bof_attempts = [a for a in all_attempts if a["question_type"] == "BOF"]
-        tf_attempts = [a for a in all_attempts if a["question_type"] == "TF"]
-        bof_correct = sum(1 for a in bof_attempts if a["is_correct"])
-        tf_points = round(sum(float(a["marks_obtained"] or 0) for a in tf_attempts), 1)
-
         stats = {
-            "total_sessions": len(sessions_data),
-            "avg_score": avg_score,
-            "best_score": best_score,
-            "last_attempt_score": last_attempt_score,
+            "total_sessions": summary["total_sessions"],
+            "avg_score": float(summary["avg_score"]),
+            "best_score": float(summary["best_score"]),
+            "last_attempt_score": float(summary["last_attempt_score"]),
             "bookmarks_count": bookmarks_count,
             "total_questions": total_attempts,
             "total_attempts": total_attempts,
             "total_correct": total_correct,
             "total_wrong": total_wrong,
-            "total_marks": round(total_marks, 1),
-            "bof_total": len(bof_attempts),
-            "bof_correct": bof_correct,
-            "tf_total": len(tf_attempts),
-            "tf_points": tf_points,
+            "total_marks": round(totals["total_marks"], 1),
+            "bof_total": totals["bof_total"],
+            "bof_correct": totals["bof_correct"],
+            "tf_total": totals["tf_total"],
+            "tf_points": round(totals["tf_points"], 1),
             "unique_questions_covered": unique_questions_covered,
             "total_bank_questions": total_bank_questions,
             "overall_coverage_pct": overall_coverage_pct
@@ -446,6 +585,7 @@ def home():
 
         return render_template("dashboard.html",
                                sessions=sessions_data,
+                               sessions_next=sessions_next,
                                progress=progress,
                                progress_map=progress_map,
                                section_question_counts=section_question_counts,
@@ -454,6 +594,7 @@ def home():
     except Exception:
         return render_template("dashboard.html",
                                sessions=[],
+                               sessions_next=None,
                                progress=[],
                                progress_map={},
                                section_question_counts={},
@@ -466,13 +607,37 @@ def home():
                                })
 
 
+@dashboard.route("/api/dashboard/sessions")
+@login_required_custom
+def session_history():
+    """Next page of completed sessions after the `after` cursor, as JSON."""
+    user_id = session["user_id"]
+    limit = min(max(request.args.get("limit", SESSION_HISTORY_PAGE_SIZE, type=int), 1), SESSION_HISTORY_MAX_PAGE_SIZE)
+    after = request.args.get("after")
+    try:
+        after = _decode_history_cursor(after) if after else None
+    except ValueError:
+        return jsonify({"status": "error", "message": "Invalid cursor"}), 400
+
+    try:
+        conn = get_db()
+        try:
+            cur = conn.cursor()
+            rows, next_cursor = _load_session_history(cur, user_id, after=after, limit=limit)
+            cur.close()
+        finally:
+            pool = init_db_pool()
+            pool.putconn(conn)
+
+        return jsonify({"status": "ok", "sessions": rows, "next": next_cursor})
+    except Exception as e:
+        # Log error in production: logger.error(f"Session history error: {e}")
+        return jsonify({"status": "error", "message": "An error occurred"}), 500
+
+
 @dashboard.route("/study", methods=["GET", "POST"])
 @login_required_custom
 def study():
-    pages = _get_study_pages()
-    pages_by_slug = {p["slug"]: p for p in pages}
-    available_slugs = set(pages_by_slug.keys())
-
     selected_slug = None
     if request.method == "POST":
         selected_slug = (request.form.get("slug") or "").strip()
@@ -480,22 +645,18 @@ def study():
         selected_slug = session.pop("study_slug", None)
 
     if selected_slug:
-        page = pages_by_slug.get(selected_slug)
+        page = study_catalog.get(selected_slug)
         if not page:
             abort(404)
-        html = render_template(f"{STUDY_DIR}/{page['filename']}")
-        html = _sanitize_study_branding(html)
-        html = _rewrite_study_internal_links(html, available_slugs)
-        return _apply_study_page_overrides(html)
+        return _study_page_response(page)
 
-    return render_template("study_index.html", pages=pages)
+    return render_template("study_index.html", pages=study_catalog.pages())
 
 
 @dashboard.route("/study/<slug>")
 @login_required_custom
 def study_page(slug):
-    pages = _get_study_pages()
-    page = next((p for p in pages if p["slug"] == slug), None)
+    page = study_catalog.get(slug)
     if not page:
         abort(404)
 
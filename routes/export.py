@@ -0,0 +1,135 @@
+from flask import Blueprint, Response, session, redirect, url_for, stream_with_context
+from config import get_db, init_db_pool
+from functools import wraps
+from datetime import date, datetime
+from decimal import Decimal
+import csv
+import io
+import json
+import uuid
+import psycopg2
+import psycopg2.extensions
+
+export = Blueprint("export", __name__)
+
+# Rows fetched per round-trip from the server-side cursor
+EXPORT_ITERSIZE = 2000
+# Rows written per chunk of the response body
+EXPORT_CHUNK_ROWS = 500
+
+EXPORT_COLUMNS = (
+    "session_id", "session_started_at", "session_completed_at", "session_completed",
+    "session_sections", "session_score", "session_percentage",
+    "attempt_id", "question_id", "section", "question_type",
+    "bof_answer", "tf_answers", "is_correct", "marks_obtained",
+)
+
+# One row per attempt with its session; column order matches EXPORT_COLUMNS.
+EXPORT_SQL = """
+    SELECT s.id, s.started_at, s.completed_at, s.completed,
+           s.section_filter, s.score, s.percentage,
+           a.id, a.question_id, q.section, COALESCE(a.question_type, q.question_type),
+           a.bof_answer, a.tf_answers, a.is_correct, a.marks_obtained
+    FROM sessions s
+    JOIN attempts a ON a.session_id = s.id
+    JOIN questions q ON q.id = a.question_id
+    WHERE s.user_id = %s
+    ORDER BY s.started_at, s.id, a.id
+"""
+
+
+def login_required_custom(f):
+    @wraps(f)
+    def decorated(*args, **kwargs):
+        if "user_id" not in session:
+            return redirect(url_for("auth.login"))
+        return f(*args, **kwargs)
+    return decorated
+
+
+def _plain_value(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def _csv_chunks(cur):
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    tf_index = EXPORT_COLUMNS.index("tf_answers")
+    for n, row in enumerate(cur, 1):
+        row = [_plain_value(v) for v in row]
+        if row[tf_index] is not None:
+            row[tf_index] = json.dumps(row[tf_index])
+        writer.writerow(row)
+        if n % EXPORT_CHUNK_ROWS == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
+
+
+def _ndjson_chunks(cur):
+    lines = []
+    for row in cur:
+        lines.append(json.dumps(dict(zip(EXPORT_COLUMNS, map(_plain_value, row)))))
+        if len(lines) == EXPORT_CHUNK_ROWS:
+            yield "\n".join(lines) + "\n"
+            lines = []
+    if lines:
+        yield "\n".join(lines) + "\n"
+
+
+EXPORT_FORMATS = {
+    "csv": ("text/csv", _csv_chunks),
+    "ndjson": ("application/x-ndjson", _ndjson_chunks),
+}
+
+
+def _release(conn, cur):
+    try:
+        cur.close()
+    except psycopg2.Error:
+        pass
+    # putconn rolls back the export's transaction, which drops the server-side cursor.
+    pool = init_db_pool()
+    pool.putconn(conn)
+
+
+@export.route("/export/history.<any(csv, ndjson):fmt>")
+@login_required_custom
+def history(fmt):
+    """
+    Stream every attempt of the user's sessions as CSV or NDJSON. Rows come
+    from a named (server-side) cursor EXPORT_ITERSIZE at a time, so memory
+    stays flat however long the history is. The connection is taken here and
+    handed back when the response is closed, i.e. held only for the stream.
+    """
+    user_id = session["user_id"]
+    mimetype, chunks = EXPORT_FORMATS[fmt]
+
+    try:
+        conn = get_db()
+        try:
+            cur = conn.cursor(name=f"export_{uuid.uuid4().hex}", cursor_factory=psycopg2.extensions.cursor)
+            cur.itersize = EXPORT_ITERSIZE
+            cur.execute(EXPORT_SQL, (user_id,))
+        except Exception:
+            pool = init_db_pool()
+            pool.putconn(conn)
+            raise
+    except Exception as e:
+        # Log error in production: logger.error(f"History export error: {e}")
+        return redirect(url_for("dashboard.home"))
+
+    filename = f"attempt-history-{date.today():%Y%m%d}.{fmt}"
+    response = Response(stream_with_context(chunks(cur)), mimetype=mimetype)
+    response.headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+    response.headers["Cache-Control"] = "private, no-store"
+    response.call_on_close(lambda: _release(conn, cur))
+    return response
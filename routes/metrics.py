@@ -0,0 +1,11 @@
+from flask import Blueprint, Response, request, abort
+from config import METRICS_TOKEN, render_pool_metrics
+
+metrics = Blueprint("metrics", __name__)
+
+
+@metrics.route("/metrics")
+def prometheus():
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        abort(401)
+    return Response(render_pool_metrics(), mimetype="text/plain; version=0.0.4")
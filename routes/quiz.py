@@ -1,12 +1,151 @@
-from flask import Blueprint, render_template, session, redirect, url_for, request, jsonify, flash
-from config import get_db, init_db_pool
+from flask import Blueprint, Response, render_template, stream_template, session, redirect, url_for, request, jsonify, flash, get_flashed_messages
+from psycopg2.extras import execute_values
+from config import get_db, init_db_pool, ANSWER_WRITE_BEHIND, EXPLANATION_CACHE_SIZE
+from answer_queue import answer_queue
+from question_bank import question_bank
+from quiz_progress import quiz_progress
+from results_cache import results_cache
+from user_stats import record_session
+import gzip
+import hashlib
+import json
 import uuid
-import random
 import re
+from functools import lru_cache
 from markupsafe import Markup, escape
 
 quiz = Blueprint("quiz", __name__)
 
+# Inserts the session and its ordered question list in a single round-trip.
+CREATE_SESSION_SQL = """
+    WITH new_session AS (
+        INSERT INTO sessions (id, user_id, section_filter, total_questions, bof_count, tf_count, time_limit_seconds)
+        VALUES (%s, %s, %s, %s, %s, %s, %s)
+        RETURNING id, started_at
+    ), new_questions AS (
+        INSERT INTO session_questions (session_id, question_id, question_order)
+        SELECT new_session.id, q.question_id, q.question_order
+        FROM new_session, unnest(%s) WITH ORDINALITY AS q(question_id, question_order)
+    )
+    SELECT started_at FROM new_session
+"""
+
+# Scores and completes the session, then upserts per-section progress computed
+# from its attempts. Only a session that was still open is touched, so a
+# concurrent or repeated finish is a no-op.
+FINISH_SESSION_SQL = """
+    WITH scored AS (
+        SELECT COALESCE(SUM(marks_obtained), 0) AS total_marks, COUNT(*) AS total_possible
+        FROM attempts
+        WHERE session_id = %(session_id)s
+    ), completed AS (
+        UPDATE sessions
+        SET score = scored.total_marks,
+            total_score = scored.total_possible,
+            percentage = CASE WHEN scored.total_possible > 0
+                              THEN ROUND(scored.total_marks * 100.0 / scored.total_possible, 2)
+                              ELSE 0 END,
+            completed = TRUE,
+            completed_at = NOW()
+        FROM scored
+        WHERE sessions.id = %(session_id)s AND sessions.user_id = %(user_id)s AND sessions.completed IS NOT TRUE
+        RETURNING sessions.id, sessions.user_id
+    ), section_totals AS (
+        SELECT c.user_id, q.section,
+               COUNT(*) AS total,
+               COUNT(*) FILTER (WHERE a.is_correct) AS correct,
+               COALESCE(SUM(a.marks_obtained), 0) AS marks
+        FROM completed c
+        JOIN attempts a ON a.session_id = c.id
+        JOIN questions q ON q.id = a.question_id
+        GROUP BY c.user_id, q.section
+    ), progress AS (
+        INSERT INTO section_progress (user_id, section, questions_attempted, questions_correct, best_score_percentage, last_attempted)
+        SELECT user_id, section, total, correct, ROUND(marks * 100.0 / total, 2), NOW()
+        FROM section_totals
+        ON CONFLICT (user_id, section) DO UPDATE SET
+            questions_attempted = section_progress.questions_attempted + EXCLUDED.questions_attempted,
+            questions_correct = section_progress.questions_correct + EXCLUDED.questions_correct,
+            best_score_percentage = GREATEST(section_progress.best_score_percentage, EXCLUDED.best_score_percentage),
+            last_attempted = NOW()
+    )
+    SELECT
+        EXISTS (SELECT 1 FROM sessions WHERE id = %(session_id)s AND user_id = %(user_id)s) AS session_found,
+        EXISTS (SELECT 1 FROM completed) AS newly_completed
+"""
+
+# Questions sent ahead of the current one so the quiz page can advance instantly.
+QUIZ_PREFETCH = 2
+
+INSERT_ATTEMPT_SQL = """
+    INSERT INTO attempts (session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+    ON CONFLICT (session_id, question_id) DO NOTHING
+"""
+
+# Exam mode saves answers in batches and a candidate may change an answer
+# between checkpoints, so a later save replaces the earlier one.
+SAVE_EXAM_ANSWERS_SQL = """
+    INSERT INTO attempts (session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained)
+    VALUES %s
+    ON CONFLICT (session_id, question_id) DO UPDATE SET
+        bof_answer = EXCLUDED.bof_answer,
+        tf_answers = EXCLUDED.tf_answers,
+        is_correct = EXCLUDED.is_correct,
+        marks_obtained = EXCLUDED.marks_obtained
+"""
+
+# Questions left unanswered when an exam is submitted score zero, as a blank
+# submit does in the question-by-question flow.
+INSERT_UNANSWERED_SQL = """
+    INSERT INTO attempts (session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained)
+    VALUES %s
+    ON CONFLICT (session_id, question_id) DO NOTHING
+"""
+
+EXAM_GZIP_LEVEL = 6
+
+BOOKMARKS_PAGE_SIZE = 25
+
+# One page of bookmarks, newest first, below the `before` bookmark id; the
+# last attempt per bookmark comes from a lateral join instead of one query per row.
+BOOKMARKS_PAGE_SQL = """
+    SELECT b.id AS bookmark_id, b.question_id, q.question_text, q.question_type, q.section, q.explanation,
+           la.bof_answer, la.tf_answers, la.is_correct, la.marks_obtained,
+           la.id IS NOT NULL AS has_attempt
+    FROM bookmarks b
+    JOIN questions q ON q.id = b.question_id
+    LEFT JOIN LATERAL (
+        SELECT a.id, a.bof_answer, a.tf_answers, a.is_correct, a.marks_obtained
+        FROM attempts a
+        JOIN sessions s ON s.id = a.session_id
+        WHERE s.user_id = b.user_id AND a.question_id = b.question_id
+        ORDER BY a.id DESC
+        LIMIT 1
+    ) la ON TRUE
+    WHERE b.user_id = %(user_id)s
+      AND (%(before)s::integer IS NULL OR b.id < %(before)s)
+      AND (%(section)s::text IS NULL OR q.section = %(section)s)
+      AND (%(question_type)s::text IS NULL OR q.question_type = %(question_type)s)
+    ORDER BY b.id DESC
+    LIMIT %(limit)s
+"""
+
+# Bookmark counts per section, for the filter bar.
+BOOKMARK_SECTIONS_SQL = """
+    SELECT q.section, COUNT(*) AS count
+    FROM bookmarks b
+    JOIN questions q ON q.id = b.question_id
+    WHERE b.user_id = %s
+    GROUP BY q.section
+    ORDER BY q.section
+"""
+
+# Explanation formatting patterns, compiled once.
+SENTENCE_SPLIT_RE = re.compile(r"(?<=[.!?])\s+(?=[A-Z])")
+LIST_ITEM_RE = re.compile(r"^(?:[-*•]\s+|\d+[.)]\s+)(.+)$")
+
+
 def login_required_custom(f):
     from functools import wraps
     @wraps(f)
@@ -17,38 +156,212 @@ def login_required_custom(f):
     return decorated
 
 
+# Progress keys older cookies carried before it moved server-side.
+LEGACY_QUIZ_KEYS = ("quiz_question_ids", "quiz_current", "quiz_started_at", "quiz_time_limit")
+
+
 def _get_quiz_state():
+    """
+    Return (quiz_session_id, progress) for the active quiz, or None. The
+    cookie holds the session id and current position; the question list
+    comes from quiz_progress.
+    """
     quiz_session_id = session.get("quiz_session_id")
-    question_ids = session.get("quiz_question_ids")
-    current = session.get("quiz_current")
-
     if not quiz_session_id:
         return None
-    if not isinstance(question_ids, list) or not question_ids:
+
+    for key in LEGACY_QUIZ_KEYS:
+        session.pop(key, None)
+
+    try:
+        progress = quiz_progress.get(quiz_session_id, session["user_id"])
+    except Exception as e:
+        # Log error in production: logger.error(f"Quiz progress load error: {e}")
         return None
-    if not isinstance(current, int) or current < 0:
+    if not progress:
         return None
-
-    return quiz_session_id, question_ids, current
+    return quiz_session_id, progress
 
 
 def _clear_quiz_state():
-    session.pop("quiz_session_id", None)
-    session.pop("quiz_question_ids", None)
-    session.pop("quiz_current", None)
+    quiz_session_id = session.pop("quiz_session_id", None)
+    if quiz_session_id:
+        quiz_progress.discard(quiz_session_id)
+    for key in LEGACY_QUIZ_KEYS:
+        session.pop(key, None)
+
+
+def _score_answer(entry, data):
+    """
+    Score a submitted answer against a cached question bank entry.
+    Returns (question_type, bof_answer, tf_answers, is_correct, marks).
+    """
+    q_type = entry["question"]["question_type"] if entry else None
+
+    is_correct = False
+    marks = 0
+    bof_answer = None
+    tf_answers = None
+
+    if q_type == "BOF":
+        bof_answer = data.get("bof_answer")
+        is_correct = bof_answer == entry["correct_label"]
+        marks = 1 if is_correct else 0
+
+    elif q_type == "TF":
+        tf_stmts = entry["tf_statements"]
+        tf_answers = []
+        answered_count = 0
+        correct_count = 0
+        wrong_count = 0
+        for stmt in tf_stmts:
+            raw_ans = data.get(f"tf_{stmt['statement_number']}")
+            if raw_ans == "true":
+                user_ans = True
+            elif raw_ans == "false":
+                user_ans = False
+            else:
+                user_ans = None
 
+            tf_answers.append(user_ans)
+            if user_ans is None:
+                continue
 
-def _format_explanation_text(text):
-    if not text:
-        return Markup("")
+            answered_count += 1
+            if user_ans == stmt["is_true"]:
+                correct_count += 1
+            else:
+                wrong_count += 1
+
+        # True/False scoring rule:
+        # +0.2 for each answered-correct statement, -0.2 for each answered-wrong statement,
+        # unanswered statements contribute 0.
+        raw_marks = (correct_count * 0.2) - (wrong_count * 0.2)
+        marks = round(max(0, raw_marks), 1)
+        is_correct = bool(tf_stmts) and answered_count == len(tf_stmts) and wrong_count == 0
+
+    return q_type, bof_answer, tf_answers, is_correct, marks
+
+
+def _is_malformed(entry):
+    """A question the candidate cannot answer: missing, or without options / statements."""
+    question_data = entry["question"] if entry else None
+    if not question_data:
+        return True
+    if question_data["question_type"] == "BOF":
+        return not entry["options"]
+    if question_data["question_type"] == "TF":
+        return not entry["tf_statements"]
+    return False
+
+
+def _public_question(entry, number):
+    """Client payload for one question, without answer keys. `number` is its 1-based position."""
+    question_data = entry["question"]
+    return {
+        "id": question_data["id"],
+        "number": number,
+        "question_type": question_data["question_type"],
+        "section": question_data["section"],
+        "question_text": question_data["question_text"],
+        "options": [
+            {"option_label": o["option_label"], "option_text": o["option_text"]}
+            for o in entry["options"]
+        ] if question_data["question_type"] == "BOF" else [],
+        "tf_statements": [
+            {"statement_number": st["statement_number"], "statement_text": st["statement_text"]}
+            for st in entry["tf_statements"]
+        ] if question_data["question_type"] == "TF" else [],
+    }
+
+
+def _skip_malformed(progress):
+    """Advance past malformed questions at the current position. Returns how many were skipped."""
+    question_ids = progress["question_ids"]
+    skipped = 0
+    while progress["current"] + skipped < len(question_ids):
+        if not _is_malformed(question_bank.get(question_ids[progress["current"] + skipped])):
+            break
+        skipped += 1
+    if skipped:
+        quiz_progress.advance(progress, skipped)
+    return skipped
+
+
+def _upcoming_questions(progress, count):
+    """Public payloads of the current question and the next ones, `count` in all."""
+    start = progress["current"]
+    # Read a little further than needed so a malformed question does not shorten the window.
+    window = progress["question_ids"][start:start + count + 3]
+    entries = question_bank.get_many(window)
+
+    upcoming = []
+    for offset, question_id in enumerate(window):
+        entry = entries.get(question_id)
+        if _is_malformed(entry):
+            continue
+        upcoming.append(_public_question(entry, start + offset + 1))
+        if len(upcoming) == count:
+            break
+    return upcoming
+
+
+def _sync_progress(quiz_session_id, user_id, progress, question_id):
+    """
+    Progress for answering `question_id`. If the page is ahead of the cookie's
+    position (e.g. a response that advanced it never reached the browser),
+    rebuild it from the database first.
+    """
+    if question_id in progress["question_ids"][progress["current"] + 1:]:
+        return quiz_progress.reload(quiz_session_id, user_id) or progress
+    return progress
+
+
+def _record_answer(quiz_session_id, user_id, progress, question_id, data):
+    """
+    Score and store the answer to the current question, then move past it.
+    Returns the updated progress, or None if the quiz no longer exists.
+    """
+    # Score against cached answer keys before borrowing a connection.
+    entry = question_bank.get(question_id)
+    q_type, bof_answer, tf_answers, is_correct, marks = _score_answer(entry, data)
+
+    if ANSWER_WRITE_BEHIND:
+        if answer_queue.enqueue(quiz_session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks):
+            quiz_progress.advance(progress)
+            return progress
+        return quiz_progress.reload(quiz_session_id, user_id)
+
+    conn = get_db()
+    try:
+        cur = conn.cursor()
+
+        # A double-submit hits the (session_id, question_id) unique index and is
+        # ignored. The cached position was stale then (e.g. another worker
+        # served the previous answer), so it is rebuilt from the attempts.
+        cur.execute(INSERT_ATTEMPT_SQL, (quiz_session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks))
+        inserted = cur.rowcount > 0
+
+        conn.commit()
+        if inserted:
+            quiz_progress.advance(progress)
+        else:
+            progress = quiz_progress.reload(quiz_session_id, user_id, cur=cur)
+        cur.close()
+        return progress
+    finally:
+        pool = init_db_pool()
+        pool.putconn(conn)
 
-    raw = str(text).replace("\r\n", "\n").strip()
+
+def _render_explanation(text):
+    raw = text.replace("\r\n", "\n").strip()
     if not raw:
         return Markup("")
 
     # If explanation is a single long paragraph, split into smaller readable chunks.
     if "\n" not in raw:
-        sentences = re.split(r"(?<=[.!?])\s+(?=[A-Z])", raw)
+        sentences = SENTENCE_SPLIT_RE.split(raw)
         if len(sentences) >= 3:
             parts = [" ".join(sentences[i:i + 2]).strip() for i in range(0, len(sentences), 2)]
         else:
@@ -60,7 +373,7 @@ def _format_explanation_text(text):
     list_items = []
 
     for part in parts:
-        match = re.match(r"^(?:[-*•]\s+|\d+[.)]\s+)(.+)$", part)
+        match = LIST_ITEM_RE.match(part)
         if match:
             list_items.append(f"<li>{escape(match.group(1))}</li>")
             continue
@@ -77,6 +390,20 @@ def _format_explanation_text(text):
     return Markup("".join(html_blocks))
 
 
+@lru_cache(maxsize=EXPLANATION_CACHE_SIZE)
+def _cached_explanation(question_id, text):
+    # Keyed by question id and the full text, so an edited explanation gets a
+    # new entry and the stale one ages out of the LRU.
+    return _render_explanation(text)
+
+
+def _format_explanation_text(text, question_id=None):
+    """Explanation as HTML paragraphs / lists; memoized, as explanations are static bank content."""
+    if not text:
+        return Markup("")
+    return _cached_explanation(question_id, str(text))
+
+
 def _build_results_payload(cur, quiz_session_id, user_id):
     cur.execute("SELECT * FROM sessions WHERE id = %s AND user_id = %s", (quiz_session_id, user_id))
     session_data = cur.fetchone()
@@ -92,26 +419,20 @@ def _build_results_payload(cur, quiz_session_id, user_id):
     """, (quiz_session_id,))
     attempts = cur.fetchall()
 
+    # Options / statements for every attempt in one set-based load (or none when cached).
+    bank_entries = question_bank.get_many([a["question_id"] for a in attempts], cur=cur)
+
     attempts_list = []
     for attempt in attempts:
         att = dict(attempt)
-        att["explanation_formatted"] = _format_explanation_text(att.get("explanation"))
+        att["explanation_formatted"] = _format_explanation_text(att.get("explanation"), att["question_id"])
 
+        entry = bank_entries.get(att["question_id"])
         if att["question_type"] == "BOF":
-            cur.execute("""
-                SELECT * FROM options
-                WHERE question_id = %s
-                ORDER BY option_label
-            """, (att["question_id"],))
-            att["bof_options"] = cur.fetchall()
+            att["bof_options"] = entry["options"] if entry else []
             att["tf_statements"] = []
         else:
-            cur.execute("""
-                SELECT * FROM tf_statements
-                WHERE question_id = %s
-                ORDER BY statement_number
-            """, (att["question_id"],))
-            att["tf_statements"] = cur.fetchall()
+            att["tf_statements"] = entry["tf_statements"] if entry else []
             att["bof_options"] = []
 
         attempts_list.append(att)
@@ -119,6 +440,62 @@ def _build_results_payload(cur, quiz_session_id, user_id):
     return session_data, attempts_list
 
 
+def _load_results(quiz_session_id, user_id):
+    """
+    Return (session_data, attempts_list, cached) for one of the user's sessions.
+    Completed sessions come from results_cache under the current bank version
+    (no database round-trip on a hit) and `cached` is their cache entry;
+    anything else is built fresh and `cached` is None.
+    """
+    version = question_bank.current_version()
+    cached = results_cache.get(quiz_session_id, version)
+    if cached is not None and cached["user_id"] == str(user_id):
+        return cached["session_data"], cached["attempts"], cached
+
+    conn = get_db()
+    try:
+        cur = conn.cursor()
+        session_data, attempts_list = _build_results_payload(cur, quiz_session_id, user_id)
+        cur.close()
+    finally:
+        pool = init_db_pool()
+        pool.putconn(conn)
+
+    if not session_data or not session_data["completed"]:
+        return session_data, attempts_list, None
+    cached = results_cache.put(quiz_session_id, version, user_id, session_data, attempts_list)
+    return session_data, attempts_list, cached
+
+
+def _results_response(session_data, attempts_list, cached):
+    """
+    Render the results page. A cached (completed) session gets a strong ETag:
+    the hash of the page this process last rendered for it (for this user's
+    nav bar). A revisit whose If-None-Match still matches is answered with
+    304 without rendering; otherwise the page is rendered, the ETag
+    recomputed from the new body (so template or content changes show up)
+    and compared with If-None-Match, so a worker that rendered the page
+    afresh still answers 304 when it is unchanged.
+    """
+    if cached is None or session.get("_flashes"):
+        return render_template("results.html", session_data=session_data, attempts=attempts_list)
+
+    username = session.get("username", "")
+    page_etag = cached.get("page_etag")
+    if page_etag and page_etag[0] == username and request.if_none_match.contains(page_etag[1]):
+        response = Response(status=304)
+        etag = page_etag[1]
+    else:
+        body = render_template("results.html", session_data=session_data, attempts=attempts_list).encode("utf-8")
+        etag = hashlib.sha1(body).hexdigest()
+        cached["page_etag"] = (username, etag)
+        response = Response(body, mimetype="text/html")
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = "private, no-cache"
+    response.vary.add("Cookie")
+    return response.make_conditional(request)
+
+
 @quiz.route("/start", methods=["GET", "POST"])
 @login_required_custom
 def start():
@@ -143,6 +520,7 @@ def start():
     num_questions = int(request.form.get("num_questions", 60))
     time_limit = int(request.form.get("time_limit", 3600))
     selected_sections = request.form.getlist("sections")
+    exam_mode = request.form.get("mode") == "exam"
 
     if not selected_sections:
         return redirect(url_for("quiz.start"))
@@ -166,29 +544,9 @@ def start():
         try:
             cur = conn.cursor()
 
-            # Fetch BOF questions
-            selected_bof = []
-            if bof_count > 0:
-                placeholders = ','.join(['%s'] * len(selected_sections))
-                cur.execute(f"""
-                    SELECT id FROM questions
-                    WHERE question_type = 'BOF'
-                    AND section IN ({placeholders})
-                """, selected_sections)
-                bof_ids = [r["id"] for r in cur.fetchall()]
-                selected_bof = random.sample(bof_ids, min(bof_count, len(bof_ids)))
-
-            # Fetch TF questions
-            selected_tf = []
-            if tf_count > 0:
-                placeholders = ','.join(['%s'] * len(selected_sections))
-                cur.execute(f"""
-                    SELECT id FROM questions
-                    WHERE question_type = 'TF'
-                    AND section IN ({placeholders})
-                """, selected_sections)
-                tf_ids = [r["id"] for r in cur.fetchall()]
-                selected_tf = random.sample(tf_ids, min(tf_count, len(tf_ids)))
+            # Draw from the precomputed (section, type) id index
+            selected_bof = question_bank.sample_ids(selected_sections, "BOF", bof_count, cur=cur) if bof_count > 0 else []
+            selected_tf = question_bank.sample_ids(selected_sections, "TF", tf_count, cur=cur) if tf_count > 0 else []
 
             # Default order: TF first then BOF (as requested)
             all_question_ids = selected_tf + selected_bof
@@ -198,27 +556,23 @@ def start():
                 cur.close()
                 return redirect(url_for("quiz.start"))
 
-            # Create session
+            # Create session and all its question rows in one statement
             session_id = str(uuid.uuid4())
-            cur.execute("""
-                INSERT INTO sessions (id, user_id, section_filter, total_questions, bof_count, tf_count, time_limit_seconds)
-                VALUES (%s, %s, %s, %s, %s, %s, %s)
-            """, (session_id, user_id, section_filter, len(all_question_ids), len(selected_bof), len(selected_tf), time_limit))
-
-            for i, qid in enumerate(all_question_ids):
-                cur.execute("""
-                    INSERT INTO session_questions (session_id, question_id, question_order)
-                    VALUES (%s, %s, %s)
-                """, (session_id, qid, i + 1))
+            cur.execute(CREATE_SESSION_SQL, (
+                session_id, user_id, section_filter, len(all_question_ids),
+                len(selected_bof), len(selected_tf), time_limit, all_question_ids
+            ))
+            started_at = cur.fetchone()["started_at"]
 
             conn.commit()
             cur.close()
 
+            quiz_progress.create(session_id, user_id, all_question_ids,
+                                 int(started_at.timestamp()) if started_at else None, time_limit)
+            _clear_quiz_state()
             session["quiz_session_id"] = session_id
-            session["quiz_question_ids"] = all_question_ids
-            session["quiz_current"] = 0
 
-            return redirect(url_for("quiz.question"))
+            return redirect(url_for("quiz.exam" if exam_mode else "quiz.question"))
         finally:
             pool = init_db_pool()
             pool.putconn(conn)
@@ -233,73 +587,39 @@ def question():
     if not quiz_state:
         return redirect(url_for("quiz.start"))
 
-    quiz_session_id, question_ids, current = quiz_state
+    quiz_session_id, progress = quiz_state
+    question_ids = progress["question_ids"]
+    current = progress["current"]
 
-    if not quiz_session_id:
-        return redirect(url_for("quiz.start"))
     if current >= len(question_ids):
         return redirect(url_for("quiz.finish"))
 
     question_id = question_ids[current]
 
     try:
-        conn = get_db()
-        try:
-            cur = conn.cursor()
+        entry = question_bank.get(question_id)
 
-            cur.execute("SELECT * FROM questions WHERE id = %s", (question_id,))
-            question_data = cur.fetchone()
-
-            options = []
-            tf_statements = []
-
-            if question_data:
-                if question_data["question_type"] == "BOF":
-                    cur.execute("SELECT * FROM options WHERE question_id = %s ORDER BY option_label", (question_id,))
-                    options = cur.fetchall()
-                else:
-                    cur.execute("SELECT * FROM tf_statements WHERE question_id = %s ORDER BY statement_number", (question_id,))
-                    tf_statements = cur.fetchall()
-
-            # Skip malformed questions so user is not blocked on submit validation.
-            should_skip = False
-            if not question_data:
-                should_skip = True
-            elif question_data["question_type"] == "BOF" and not options:
-                should_skip = True
-            elif question_data["question_type"] == "TF" and not tf_statements:
-                should_skip = True
-
-            if should_skip:
-                cur.close()
-                session["quiz_current"] = current + 1
-                session.modified = True
-                flash("A malformed question was skipped automatically.", "warning")
-                if session["quiz_current"] >= len(question_ids):
-                    return redirect(url_for("quiz.finish"))
-                return redirect(url_for("quiz.question"))
-
-            cur.execute("SELECT started_at, time_limit_seconds FROM sessions WHERE id = %s", (quiz_session_id,))
-            sess_data = cur.fetchone()
-
-            cur.close()
-        finally:
-            pool = init_db_pool()
-            pool.putconn(conn)
+        # Skip malformed questions so user is not blocked on submit validation.
+        if _is_malformed(entry):
+            quiz_progress.advance(progress)
+            flash("A malformed question was skipped automatically.", "warning")
+            if progress["current"] >= len(question_ids):
+                return redirect(url_for("quiz.finish"))
+            return redirect(url_for("quiz.question"))
 
-        time_limit = sess_data["time_limit_seconds"] if sess_data else 3600
-        started_at = sess_data["started_at"] if sess_data else None
-        started_at_epoch = int(started_at.timestamp()) if started_at else None
+        # The page advances client-side through /api/quiz, starting from these.
+        upcoming = _upcoming_questions(progress, QUIZ_PREFETCH + 1)
 
         return render_template("quiz.html",
-                               question=question_data,
-                               options=options,
-                               tf_statements=tf_statements,
+                               question=entry["question"],
+                               options=entry["options"],
+                               tf_statements=entry["tf_statements"],
+                               upcoming=upcoming,
                                current=current + 1,
                                total=len(question_ids),
                                session_id=quiz_session_id,
-                               time_limit=time_limit,
-                               started_at_epoch=started_at_epoch)
+                               time_limit=progress["time_limit"],
+                               started_at_epoch=progress["started_at"])
     except Exception as e:
         # Log error in production: logger.error(f"Question load error: {e}")
         return redirect(url_for("dashboard.home"))
@@ -313,99 +633,285 @@ def submit_answer():
     if not quiz_state:
         return redirect(url_for("quiz.start"))
 
-    quiz_session_id, question_ids, current = quiz_state
-    if current >= len(question_ids):
-        return redirect(url_for("quiz.finish"))
+    quiz_session_id, progress = quiz_state
+    try:
+        question_id = int(request.form.get("question_id"))
+    except (TypeError, ValueError):
+        return redirect(url_for("quiz.question"))
 
-    question_id = question_ids[current]
-    data = request.form
+    try:
+        progress = _sync_progress(quiz_session_id, user_id, progress, question_id)
+        question_ids = progress["question_ids"]
+        current = progress["current"]
+        if current >= len(question_ids):
+            return redirect(url_for("quiz.finish"))
+        if question_ids[current] != question_id:
+            # A repeated POST or a stale tab: only the question the form was
+            # rendered for may be answered, never the one after it.
+            return redirect(url_for("quiz.question"))
+
+        progress = _record_answer(quiz_session_id, user_id, progress, question_id, request.form)
+        if not progress or progress["current"] >= len(question_ids):
+            return redirect(url_for("quiz.finish"))
+
+        return redirect(url_for("quiz.question"))
+    except Exception as e:
+        # Log error in production: logger.error(f"Submit answer error: {e}")
+        return redirect(url_for("quiz.question"))
+
+
+@quiz.route("/api/quiz/questions")
+@login_required_custom
+def api_questions():
+    """The current question plus up to QUIZ_PREFETCH following ones, as JSON."""
+    quiz_state = _get_quiz_state()
+    if not quiz_state:
+        return jsonify({"status": "error", "message": "No active quiz", "redirect": url_for("quiz.start")}), 404
+
+    _, progress = quiz_state
+    try:
+        _skip_malformed(progress)
+        if progress["current"] >= len(progress["question_ids"]):
+            return jsonify({"status": "finished", "redirect": url_for("quiz.finish")})
+
+        return jsonify({
+            "status": "ok",
+            "total": len(progress["question_ids"]),
+            "time_limit": progress["time_limit"],
+            "started_at": progress["started_at"],
+            "questions": _upcoming_questions(progress, QUIZ_PREFETCH + 1),
+        })
+    except Exception as e:
+        # Log error in production: logger.error(f"Quiz API load error: {e}")
+        return jsonify({"status": "error", "message": "An error occurred", "redirect": url_for("quiz.question")}), 500
+
+
+@quiz.route("/api/quiz/answer", methods=["POST"])
+@login_required_custom
+def api_answer():
+    """
+    Record the answer to the current question (JSON body with `question_id`
+    plus bof_answer / tf_N fields) and return the next questions inline, so
+    the page advances without a redirect and a second request.
+    """
+    user_id = session["user_id"]
+    quiz_state = _get_quiz_state()
+    if not quiz_state:
+        return jsonify({"status": "error", "message": "No active quiz", "redirect": url_for("quiz.start")}), 404
+
+    quiz_session_id, progress = quiz_state
+    data = request.get_json(silent=True) or request.form
+    try:
+        question_id = int(data.get("question_id"))
+    except (TypeError, ValueError):
+        return jsonify({"status": "error", "message": "question_id is required"}), 400
 
     try:
+        progress = _sync_progress(quiz_session_id, user_id, progress, question_id)
+        _skip_malformed(progress)
+        question_ids = progress["question_ids"]
+        current = progress["current"]
+
+        if current < len(question_ids) and question_ids[current] == question_id:
+            progress = _record_answer(quiz_session_id, user_id, progress, question_id, data)
+            if not progress:
+                return jsonify({"status": "error", "message": "No active quiz", "redirect": url_for("quiz.start")}), 404
+            _skip_malformed(progress)
+        elif question_id not in question_ids[:current]:
+            # Neither the current question nor a retry of an answered one: the page is out of sync.
+            return jsonify({"status": "conflict", "redirect": url_for("quiz.question")}), 409
+
+        if progress["current"] >= len(question_ids):
+            return jsonify({"status": "finished", "redirect": url_for("quiz.finish")})
+
+        return jsonify({
+            "status": "ok",
+            "total": len(question_ids),
+            "questions": _upcoming_questions(progress, QUIZ_PREFETCH + 1),
+        })
+    except Exception as e:
+        # Log error in production: logger.error(f"Quiz API answer error: {e}")
+        return jsonify({"status": "error", "message": "An error occurred", "redirect": url_for("quiz.question")}), 500
+
+
+def _saved_exam_answers(cur, quiz_session_id, entries):
+    """Answers already stored for the session, in the form fields the exam page uses."""
+    cur.execute("SELECT question_id, bof_answer, tf_answers FROM attempts WHERE session_id = %s", (quiz_session_id,))
+    saved = {}
+    for row in cur.fetchall():
+        entry = entries.get(row["question_id"])
+        if not entry:
+            continue
+        fields = {}
+        if row["bof_answer"]:
+            fields["bof_answer"] = row["bof_answer"]
+        for stmt, value in zip(entry["tf_statements"], row["tf_answers"] or []):
+            if value is not None:
+                fields[f"tf_{stmt['statement_number']}"] = "true" if value else "false"
+        saved[str(row["question_id"])] = fields
+    return saved
+
+
+def _gzip_json(payload):
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    response = Response(body, mimetype="application/json")
+    if request.accept_encodings["gzip"] > 0:
+        response.set_data(gzip.compress(body, EXAM_GZIP_LEVEL))
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Cache-Control"] = "private, no-store"
+    response.vary.add("Accept-Encoding")
+    return response
+
+
+@quiz.route("/exam")
+@login_required_custom
+def exam():
+    """Exam mode page; the question set is fetched once from api_exam()."""
+    quiz_state = _get_quiz_state()
+    if not quiz_state:
+        return redirect(url_for("quiz.start"))
+
+    _, progress = quiz_state
+    return render_template("exam.html",
+                           session_id=progress["session_id"],
+                           total=len(progress["question_ids"]),
+                           time_limit=progress["time_limit"],
+                           started_at_epoch=progress["started_at"])
+
+
+@quiz.route("/api/quiz/exam")
+@login_required_custom
+def api_exam():
+    """
+    The whole question set of the active quiz (without answer keys) plus any
+    answers already saved, as one gzip-compressed JSON payload.
+    """
+    quiz_state = _get_quiz_state()
+    if not quiz_state:
+        return jsonify({"status": "error", "message": "No active quiz", "redirect": url_for("quiz.start")}), 404
+
+    quiz_session_id, progress = quiz_state
+    try:
+        if ANSWER_WRITE_BEHIND:
+            answer_queue.flush_session(quiz_session_id)
+
         conn = get_db()
         try:
             cur = conn.cursor()
+            entries = question_bank.get_many(progress["question_ids"], cur=cur)
+            saved = _saved_exam_answers(cur, quiz_session_id, entries)
+            cur.close()
+        finally:
+            pool = init_db_pool()
+            pool.putconn(conn)
 
-            cur.execute("SELECT id FROM attempts WHERE session_id = %s AND question_id = %s", (quiz_session_id, question_id))
-            if cur.fetchone():
-                # Double-submit: already recorded, just advance and redirect
-                cur.close()
-                session["quiz_current"] = current + 1
-                
-                if session["quiz_current"] >= len(question_ids):
-                    return redirect(url_for("quiz.finish"))
-                return redirect(url_for("quiz.question"))
-
-            cur.execute("SELECT question_type FROM questions WHERE id = %s", (question_id,))
-            q = cur.fetchone()
-            q_type = q["question_type"] if q else None
-
-            is_correct = False
-            marks = 0
-            bof_answer = None
-            tf_answers = None
-
-            if q_type == "BOF":
-                bof_answer = data.get("bof_answer")
-                cur.execute("SELECT option_label FROM options WHERE question_id = %s AND is_correct = TRUE", (question_id,))
-                correct = cur.fetchone()
-                correct_label = correct["option_label"] if correct else None
-                is_correct = bof_answer == correct_label
-                marks = 1 if is_correct else 0
-
-            elif q_type == "TF":
-                cur.execute("SELECT * FROM tf_statements WHERE question_id = %s ORDER BY statement_number", (question_id,))
-                tf_stmts = cur.fetchall()
-                tf_answers = []
-                answered_count = 0
-                correct_count = 0
-                wrong_count = 0
-                for stmt in tf_stmts:
-                    raw_ans = data.get(f"tf_{stmt['statement_number']}")
-                    if raw_ans == "true":
-                        user_ans = True
-                    elif raw_ans == "false":
-                        user_ans = False
-                    else:
-                        user_ans = None
-
-                    tf_answers.append(user_ans)
-                    if user_ans is None:
-                        continue
-
-                    answered_count += 1
-                    if user_ans == stmt["is_true"]:
-                        correct_count += 1
-                    else:
-                        wrong_count += 1
-
-                # True/False scoring rule:
-                # +0.2 for each answered-correct statement, -0.2 for each answered-wrong statement,
-                # unanswered statements contribute 0.
-                raw_marks = (correct_count * 0.2) - (wrong_count * 0.2)
-                marks = round(max(0, raw_marks), 1)
-                is_correct = bool(tf_stmts) and answered_count == len(tf_stmts) and wrong_count == 0
-
-            cur.execute("""
-                INSERT INTO attempts (session_id, user_id, question_id, question_type, bof_answer, tf_answers, is_correct, marks_obtained)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
-            """, (quiz_session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks))
+        questions = [
+            _public_question(entries[question_id], number)
+            for number, question_id in enumerate(progress["question_ids"], start=1)
+            if not _is_malformed(entries.get(question_id))
+        ]
+        return _gzip_json({
+            "status": "ok",
+            "session_id": progress["session_id"],
+            "time_limit": progress["time_limit"],
+            "started_at": progress["started_at"],
+            "questions": questions,
+            "saved": saved,
+        })
+    except Exception as e:
+        # Log error in production: logger.error(f"Exam payload error: {e}")
+        return jsonify({"status": "error", "message": "An error occurred"}), 500
 
-            conn.commit()
-            cur.close()
 
-            session["quiz_current"] = current + 1
-            session.modified = True
+@quiz.route("/api/quiz/exam/answers", methods=["POST"])
+@login_required_custom
+def api_exam_answers():
+    """
+    Save a batch of exam answers: JSON {"answers": {question_id: fields},
+    "final": bool}. Checkpoints may be repeated and may revise answers. A
+    final batch also scores and completes the session, all in one
+    transaction.
+    """
+    user_id = session["user_id"]
+    quiz_state = _get_quiz_state()
+    if not quiz_state:
+        return jsonify({"status": "error", "message": "No active quiz", "redirect": url_for("quiz.start")}), 404
 
-            if session["quiz_current"] >= len(question_ids):
-                return redirect(url_for("quiz.finish"))
+    quiz_session_id, progress = quiz_state
+    data = request.get_json(silent=True) or {}
+    answers = data.get("answers") or {}
+    final = bool(data.get("final"))
+    if not isinstance(answers, dict):
+        return jsonify({"status": "error", "message": "answers must be an object"}), 400
 
-            return redirect(url_for("quiz.question"))
+    try:
+        # Only questions of this session count; score them against the cached answer keys.
+        in_session = set(progress["question_ids"])
+        batch = {}
+        for key, fields in answers.items():
+            try:
+                question_id = int(key)
+            except (TypeError, ValueError):
+                continue
+            if question_id in in_session and isinstance(fields, dict):
+                batch[question_id] = fields
+        entries = question_bank.get_many(progress["question_ids"] if final else list(batch))
+
+        rows = []
+        for question_id, fields in batch.items():
+            q_type, bof_answer, tf_answers, is_correct, marks = _score_answer(entries.get(question_id), fields)
+            rows.append((quiz_session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks))
+
+        conn = get_db()
+        try:
+            cur = conn.cursor()
+
+            # Serializes with concurrent checkpoints and refuses writes to a finished exam.
+            cur.execute("SELECT completed FROM sessions WHERE id = %s AND user_id = %s FOR UPDATE",
+                        (quiz_session_id, user_id))
+            session_row = cur.fetchone()
+            if not session_row:
+                conn.rollback()
+                cur.close()
+                return jsonify({"status": "error", "message": "No active quiz", "redirect": url_for("quiz.start")}), 404
+            if session_row["completed"]:
+                conn.rollback()
+                cur.close()
+                return jsonify({"status": "finished", "redirect": url_for("quiz.results")})
+
+            if rows:
+                execute_values(cur, SAVE_EXAM_ANSWERS_SQL, rows)
+
+            if not final:
+                conn.commit()
+                cur.close()
+                return jsonify({"status": "ok", "saved": len(rows)})
+
+            blanks = []
+            for question_id in progress["question_ids"]:
+                entry = entries.get(question_id)
+                if question_id in batch or _is_malformed(entry):
+                    continue
+                q_type, bof_answer, tf_answers, is_correct, marks = _score_answer(entry, {})
+                blanks.append((quiz_session_id, user_id, question_id, q_type, bof_answer, tf_answers, is_correct, marks))
+            if blanks:
+                execute_values(cur, INSERT_UNANSWERED_SQL, blanks)
+
+            cur.execute(FINISH_SESSION_SQL, {"session_id": quiz_session_id, "user_id": user_id})
+            if cur.fetchone()["newly_completed"]:
+                record_session(cur, quiz_session_id)
+
+            conn.commit()
+            cur.close()
         finally:
             pool = init_db_pool()
             pool.putconn(conn)
+
+        quiz_progress.discard(quiz_session_id)
+        return jsonify({"status": "finished", "redirect": url_for("quiz.results")})
     except Exception as e:
-        # Log error in production: logger.error(f"Submit answer error: {e}")
-        return redirect(url_for("quiz.question"))
+        # Log error in production: logger.error(f"Exam answers error: {e}")
+        return jsonify({"status": "error", "message": "An error occurred"}), 500
 
 
 @quiz.route("/finish")
@@ -416,89 +922,38 @@ def finish():
     if not quiz_state:
         return redirect(url_for("quiz.start"))
 
-    quiz_session_id, _, _ = quiz_state
+    quiz_session_id, _ = quiz_state
 
     try:
+        if ANSWER_WRITE_BEHIND:
+            # Score only once every queued answer for this session is in PostgreSQL.
+            answer_queue.flush_session(quiz_session_id)
+
         conn = get_db()
         try:
             cur = conn.cursor()
 
-            cur.execute("""
-                SELECT completed
-                FROM sessions
-                WHERE id = %s AND user_id = %s
-            """, (quiz_session_id, user_id))
-            sess = cur.fetchone()
-            if not sess:
+            cur.execute(FINISH_SESSION_SQL, {"session_id": quiz_session_id, "user_id": user_id})
+            outcome = cur.fetchone()
+            if not outcome["session_found"]:
                 cur.close()
                 _clear_quiz_state()
                 return redirect(url_for("quiz.start"))
 
             # Idempotent finish: avoid duplicate progress updates on reload/revisit.
-            if sess["completed"]:
+            if not outcome["newly_completed"]:
                 cur.close()
                 return redirect(url_for("quiz.results"))
 
-            cur.execute("SELECT marks_obtained, is_correct FROM attempts WHERE session_id = %s", (quiz_session_id,))
-            attempts = cur.fetchall()
-
-            total_marks = sum(a["marks_obtained"] for a in attempts)
-            total_possible = len(attempts)
-            percentage = round((total_marks / total_possible) * 100, 2) if total_possible > 0 else 0
-
-            cur.execute("""
-                UPDATE sessions
-                SET score = %s, total_score = %s, percentage = %s, completed = TRUE, completed_at = NOW()
-                WHERE id = %s AND user_id = %s
-            """, (total_marks, total_possible, percentage, quiz_session_id, user_id))
-
-            # Get attempts with their sections to update progress per section
-            cur.execute("""
-                SELECT a.is_correct, a.marks_obtained, q.section
-                FROM attempts a
-                JOIN questions q ON a.question_id = q.id
-                WHERE a.session_id = %s
-            """, (quiz_session_id,))
-            attempts_by_section = cur.fetchall()
-
-            # Group attempts by section and update progress for each section
-            from collections import defaultdict
-            section_stats = defaultdict(lambda: {"total": 0, "correct": 0, "marks": 0.0})
-            
-            for attempt in attempts_by_section:
-                section_name = attempt["section"]
-                section_stats[section_name]["total"] += 1
-                section_stats[section_name]["marks"] += float(attempt["marks_obtained"] or 0)
-                if attempt["is_correct"]:
-                    section_stats[section_name]["correct"] += 1
-
-            # Update section_progress for each section
-            for section_name, stats in section_stats.items():
-                section_percentage = round((stats["marks"] / stats["total"]) * 100, 2) if stats["total"] > 0 else 0
-                
-                cur.execute("""
-                    SELECT * FROM section_progress WHERE user_id = %s AND section = %s
-                """, (user_id, section_name))
-                existing = cur.fetchone()
-
-                if existing:
-                    cur.execute("""
-                        UPDATE section_progress
-                        SET questions_attempted = questions_attempted + %s,
-                            questions_correct = questions_correct + %s,
-                            best_score_percentage = GREATEST(best_score_percentage, %s),
-                            last_attempted = NOW()
-                        WHERE user_id = %s AND section = %s
-                    """, (stats["total"], stats["correct"], section_percentage, user_id, section_name))
-                else:
-                    cur.execute("""
-                        INSERT INTO section_progress (user_id, section, questions_attempted, questions_correct, best_score_percentage, last_attempted)
-                        VALUES (%s, %s, %s, %s, %s, NOW())
-                    """, (user_id, section_name, stats["total"], stats["correct"], section_percentage))
+            # Fold this session into the dashboard aggregates in the same transaction.
+            record_session(cur, quiz_session_id)
 
             conn.commit()
             cur.close()
 
+            # Results only need the session id; the progress entry is done.
+            quiz_progress.discard(quiz_session_id)
+
             return redirect(url_for("quiz.results"))
         finally:
             pool = init_db_pool()
@@ -517,27 +972,14 @@ def results():
         return redirect(url_for("quiz.start"))
 
     try:
-        conn = get_db()
-        try:
-            cur = conn.cursor()
-
-            session_data, attempts_list = _build_results_payload(cur, quiz_session_id, user_id)
-            if not session_data:
-                cur.close()
-                _clear_quiz_state()
-                return redirect(url_for("quiz.start"))
-            if not session_data["completed"]:
-                cur.close()
-                return redirect(url_for("quiz.finish"))
-
-            cur.close()
-        finally:
-            pool = init_db_pool()
-            pool.putconn(conn)
-
-        return render_template("results.html",
-                               session_data=session_data,
-                               attempts=attempts_list)
+        session_data, attempts_list, cached = _load_results(quiz_session_id, user_id)
+        if not session_data:
+            _clear_quiz_state()
+            return redirect(url_for("quiz.start"))
+        if not session_data["completed"]:
+            return redirect(url_for("quiz.finish"))
+
+        return _results_response(session_data, attempts_list, cached)
     except Exception:
         return redirect(url_for("dashboard.home"))
 
@@ -548,21 +990,11 @@ def results_by_session(session_id):
     user_id = session["user_id"]
 
     try:
-        conn = get_db()
-        try:
-            cur = conn.cursor()
-            session_data, attempts_list = _build_results_payload(cur, session_id, user_id)
-            cur.close()
-        finally:
-            pool = init_db_pool()
-            pool.putconn(conn)
-
+        session_data, attempts_list, cached = _load_results(session_id, user_id)
         if not session_data or not session_data["completed"]:
             return redirect(url_for("dashboard.home"))
 
-        return render_template("results.html",
-                               session_data=session_data,
-                               attempts=attempts_list)
+        return _results_response(session_data, attempts_list, cached)
     except Exception:
         return redirect(url_for("dashboard.home"))
 
@@ -602,66 +1034,82 @@ def bookmark(question_id):
         return jsonify({"status": "error", "message": "An error occurred"}), 500
 
 
+def _bookmark_items(rows, bank_entries):
+    """Template items for a page of bookmark rows, built as the page is streamed."""
+    for row in rows:
+        item = {
+            "bookmark_id": row["bookmark_id"],
+            "question_id": row["question_id"],
+            "question_text": row["question_text"],
+            "question_type": row["question_type"],
+            "section": row["section"],
+            "explanation": row["explanation"],
+        }
+        item["explanation_formatted"] = _format_explanation_text(item.get("explanation"), item["question_id"])
+        item["last_attempt"] = {
+            "bof_answer": row["bof_answer"],
+            "tf_answers": row["tf_answers"],
+            "is_correct": row["is_correct"],
+            "marks_obtained": row["marks_obtained"],
+        } if row["has_attempt"] else None
+
+        entry = bank_entries.get(row["question_id"])
+        if item["question_type"] == "BOF":
+            item["bof_options"] = entry["options"] if entry else []
+            item["tf_statements"] = []
+        else:
+            item["tf_statements"] = entry["tf_statements"] if entry else []
+            item["bof_options"] = []
+
+        yield item
+
+
 @quiz.route("/bookmarks")
 @login_required_custom
 def bookmarks():
     user_id = session["user_id"]
+    section = request.args.get("section") or None
+    question_type = request.args.get("type") if request.args.get("type") in ("BOF", "TF") else None
+    before = request.args.get("before", type=int)
 
     try:
         conn = get_db()
         try:
             cur = conn.cursor()
-            cur.execute("""
-                SELECT b.id AS bookmark_id, b.question_id, q.question_text, q.question_type, q.section, q.explanation
-                FROM bookmarks b
-                JOIN questions q ON q.id = b.question_id
-                WHERE b.user_id = %s
-                ORDER BY b.id DESC
-            """, (user_id,))
-            bookmarks_data = cur.fetchall()
-
-            bookmarks_list = []
-            for row in bookmarks_data:
-                item = dict(row)
-                question_id = item["question_id"]
-                item["explanation_formatted"] = _format_explanation_text(item.get("explanation"))
-
-                cur.execute("""
-                    SELECT a.bof_answer, a.tf_answers, a.is_correct, a.marks_obtained
-                    FROM attempts a
-                    JOIN sessions s ON s.id = a.session_id
-                    WHERE s.user_id = %s AND a.question_id = %s
-                    ORDER BY a.id DESC
-                    LIMIT 1
-                """, (user_id, question_id))
-                last_attempt = cur.fetchone()
-                item["last_attempt"] = dict(last_attempt) if last_attempt else None
-
-                if item["question_type"] == "BOF":
-                    cur.execute("""
-                        SELECT option_label, option_text, is_correct
-                        FROM options
-                        WHERE question_id = %s
-                        ORDER BY option_label
-                    """, (question_id,))
-                    item["bof_options"] = cur.fetchall()
-                    item["tf_statements"] = []
-                else:
-                    cur.execute("""
-                        SELECT statement_number, statement_text, is_true
-                        FROM tf_statements
-                        WHERE question_id = %s
-                        ORDER BY statement_number
-                    """, (question_id,))
-                    item["tf_statements"] = cur.fetchall()
-                    item["bof_options"] = []
-
-                bookmarks_list.append(item)
+            cur.execute(BOOKMARK_SECTIONS_SQL, (user_id,))
+            sections = cur.fetchall()
+
+            cur.execute(BOOKMARKS_PAGE_SQL, {
+                "user_id": user_id,
+                "section": section,
+                "question_type": question_type,
+                "before": before,
+                "limit": BOOKMARKS_PAGE_SIZE + 1,
+            })
+            rows = cur.fetchall()
+            page, more = rows[:BOOKMARKS_PAGE_SIZE], len(rows) > BOOKMARKS_PAGE_SIZE
+
+            bank_entries = question_bank.get_many([r["question_id"] for r in page], cur=cur)
             cur.close()
         finally:
             pool = init_db_pool()
             pool.putconn(conn)
 
-        return render_template("bookmarks.html", bookmarks=bookmarks_list)
+        filters = {"section": section, "type": question_type}
+        next_url = url_for("quiz.bookmarks", before=page[-1]["bookmark_id"], **filters) if more else None
+        first_url = url_for("quiz.bookmarks", **filters) if before else None
+
+        # The session cookie is written before a streamed body, so take any
+        # flashed messages now rather than from inside the template.
+        get_flashed_messages(with_categories=True)
+        return Response(stream_template("bookmarks.html",
+                                        bookmarks=_bookmark_items(page, bank_entries),
+                                        has_bookmarks=bool(page),
+                                        total_bookmarks=sum(r["count"] for r in sections),
+                                        sections=sections,
+                                        selected_section=section,
+                                        selected_type=question_type,
+                                        next_url=next_url,
+                                        first_url=first_url))
     except Exception:
         return redirect(url_for("dashboard.home"))
@@ -0,0 +1,84 @@
+"""Conditional GETs for study pages, results pages and static assets; no database needed."""
+import gzip
+import uuid
+
+import pytest
+from flask import url_for
+
+import routes.quiz as quiz_routes
+from routes.dashboard import study_catalog
+
+
+@pytest.fixture
+def study_slug():
+    pages = study_catalog.pages()
+    if not pages:
+        pytest.skip("no study pages in templates/v22")
+    return pages[0]["slug"]
+
+
+def _get_study(client, slug, **headers):
+    with client.session_transaction() as sess:
+        sess["study_slug"] = slug
+    return client.get("/study", headers=headers)
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_study_page_revalidates_with_304(client, study_slug, encoding):
+    first = _get_study(client, study_slug, **{"Accept-Encoding": encoding})
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+    assert (first.headers.get("Content-Encoding") == "gzip") == (encoding == "gzip")
+
+    again = _get_study(client, study_slug, **{"Accept-Encoding": encoding, "If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
+
+
+def test_gzip_variant_has_own_etag_and_same_content(client, study_slug):
+    plain = _get_study(client, study_slug, **{"Accept-Encoding": "identity"})
+    packed = _get_study(client, study_slug, **{"Accept-Encoding": "gzip"})
+    assert packed.headers["ETag"] != plain.headers["ETag"]
+    assert gzip.decompress(packed.data) == plain.data
+
+    stale = _get_study(client, study_slug, **{"Accept-Encoding": "gzip", "If-None-Match": plain.headers["ETag"]})
+    assert stale.status_code == 200
+
+
+def test_versioned_static_asset_revalidates_with_304(app, client):
+    with app.test_request_context():
+        url = url_for("static", filename="favicon-go.svg")
+    assert "?v=" in url
+
+    first = client.get(url)
+    assert first.status_code == 200
+    assert "max-age=31536000" in first.headers["Cache-Control"]
+    etag = first.headers["ETag"]
+
+    again = client.get(url, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    first.close()
+    again.close()
+
+
+def test_results_page_revalidates_on_another_worker(client, monkeypatch):
+    session_id = str(uuid.UUID(int=7))
+    session_data = {"id": session_id, "completed": True, "score": 3, "percentage": 75.0,
+                    "section_filter": "Cardiology", "time_taken_seconds": 600}
+
+    def load_results(quiz_session_id, user_id):
+        # A fresh cache entry each time, as on a worker that never rendered the page.
+        return session_data, [], {"user_id": str(user_id), "session_data": session_data,
+                                  "attempts": [], "page_etag": None}
+
+    monkeypatch.setattr(quiz_routes, "_load_results", load_results)
+    first = client.get(f"/results/{session_id}")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+
+    again = client.get(f"/results/{session_id}", headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.data == b""
+    assert again.headers["ETag"] == etag
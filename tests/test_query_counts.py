@@ -0,0 +1,121 @@
+"""
+The results and bookmarks pages must issue a fixed number of queries however
+many attempts / bookmarks they show (no per-row lookups). Counted through a
+fake cursor that answers each statement from in-memory rows.
+"""
+import re
+import uuid
+
+import pytest
+
+import routes.quiz as quiz_routes
+from question_bank import QuestionBankCache
+
+SESSION_ID = str(uuid.UUID(int=7))
+
+
+class FakeCursor:
+    def __init__(self, question_ids, question_type):
+        self.question_ids = question_ids
+        self.question_type = question_type
+        self.statements = []
+        self._result = []
+
+    def _question(self, qid):
+        return {"id": qid, "section": "Cardiology", "question_type": self.question_type,
+                "question_text": f"Question {qid}", "explanation": "First point. Second point. Third point."}
+
+    def execute(self, sql, params=None):
+        self.statements.append(sql)
+        if "FROM bank_version" in sql:
+            self._result = [{"version": 1}]
+        elif "FROM sessions WHERE id" in sql:
+            self._result = [{"id": SESSION_ID, "completed": True}]
+        elif "FROM attempts a" in sql and "JOIN questions q" in sql and "session_id = %s" in sql:
+            self._result = [
+                dict(self._question(qid), id=n, question_id=qid, bof_answer="A", tf_answers=None,
+                     is_correct=True, marks_obtained=1)
+                for n, qid in enumerate(self.question_ids, 1)
+            ]
+        elif "GROUP BY q.section" in sql:
+            self._result = [{"section": "Cardiology", "count": len(self.question_ids)}]
+        elif "FROM bookmarks b" in sql:
+            self._result = [
+                dict(self._question(qid), bookmark_id=qid, question_id=qid, bof_answer=None, tf_answers=None,
+                     is_correct=None, marks_obtained=None, has_attempt=False)
+                for qid in self.question_ids
+            ]
+        elif re.search(r"FROM questions WHERE id = ANY", sql):
+            self._result = [self._question(qid) for qid in params[0]]
+        elif "FROM options" in sql:
+            self._result = [
+                {"question_id": qid, "option_label": label, "option_text": label, "is_correct": label == "A"}
+                for qid in params[0] for label in "ABCDE"
+            ]
+        elif "FROM tf_statements" in sql:
+            self._result = [
+                {"question_id": qid, "statement_number": n, "statement_text": f"S{n}", "is_true": n % 2 == 0}
+                for qid in params[0] for n in range(1, 6)
+            ]
+        else:
+            raise AssertionError(f"unexpected statement: {sql}")
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+    def fetchall(self):
+        return list(self._result)
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+
+    def cursor(self):
+        return self._cursor
+
+
+class FakePool:
+    def putconn(self, conn):
+        pass
+
+
+def _cold_question_bank(monkeypatch):
+    # Every measurement starts cold, so bank loads are part of the count.
+    monkeypatch.setattr(quiz_routes, "question_bank", QuestionBankCache(10000, 60))
+
+
+def _results_statements(monkeypatch, count, question_type):
+    _cold_question_bank(monkeypatch)
+    cur = FakeCursor(list(range(1, count + 1)), question_type)
+    session_data, attempts = quiz_routes._build_results_payload(cur, SESSION_ID, "user")
+    assert len(attempts) == count
+    return cur.statements
+
+
+def _bookmarks_statements(client, monkeypatch, count, question_type):
+    _cold_question_bank(monkeypatch)
+    cur = FakeCursor(list(range(count, 0, -1)), question_type)
+    monkeypatch.setattr(quiz_routes, "get_db", lambda: FakeConnection(cur))
+    monkeypatch.setattr(quiz_routes, "init_db_pool", lambda: FakePool())
+    response = client.get("/bookmarks")
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count('class="bookmark-item"') == count
+    return cur.statements
+
+
+@pytest.mark.parametrize("question_type", ["BOF", "TF"])
+def test_results_payload_query_count_is_constant(monkeypatch, question_type):
+    one = _results_statements(monkeypatch, 1, question_type)
+    many = _results_statements(monkeypatch, 200, question_type)
+    assert len(one) == len(many)
+
+
+@pytest.mark.parametrize("question_type", ["BOF", "TF"])
+def test_bookmarks_query_count_is_constant(client, monkeypatch, question_type):
+    one = _bookmarks_statements(client, monkeypatch, 1, question_type)
+    many = _bookmarks_statements(client, monkeypatch, quiz_routes.BOOKMARKS_PAGE_SIZE, question_type)
+    assert len(one) == len(many)
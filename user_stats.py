@@ -0,0 +1,193 @@
+import click
+
+from config import get_db_connection, DASHBOARD_STATS_SOURCE
+
+# Folds one just-completed session into user_section_stats. Coverage only
+# counts questions the user had never answered before, tracked through
+# user_questions_seen, so the dashboard never needs to rescan attempts.
+RECORD_SESSION_SQL = """
+    WITH session_attempts AS (
+        SELECT a.user_id, a.question_id, a.question_type, a.is_correct, a.marks_obtained, q.section
+        FROM attempts a
+        JOIN questions q ON q.id = a.question_id
+        WHERE a.session_id = %(session_id)s
+    ), newly_seen AS (
+        INSERT INTO user_questions_seen (user_id, question_id, section)
+        SELECT user_id, question_id, MIN(section)
+        FROM session_attempts
+        GROUP BY user_id, question_id
+        ON CONFLICT (user_id, question_id) DO NOTHING
+        RETURNING section
+    ), seen_counts AS (
+        SELECT section, COUNT(*) AS new_unique
+        FROM newly_seen
+        GROUP BY section
+    ), session_totals AS (
+        SELECT
+            user_id,
+            section,
+            COUNT(*) AS attempted,
+            COUNT(*) FILTER (WHERE is_correct) AS correct,
+            COALESCE(SUM(marks_obtained), 0) AS marks_sum,
+            COUNT(*) FILTER (WHERE question_type = 'BOF') AS bof_attempted,
+            COUNT(*) FILTER (WHERE question_type = 'BOF' AND is_correct) AS bof_correct,
+            COUNT(*) FILTER (WHERE question_type = 'TF') AS tf_attempted,
+            COALESCE(SUM(marks_obtained) FILTER (WHERE question_type = 'TF'), 0) AS tf_marks_sum
+        FROM session_attempts
+        GROUP BY user_id, section
+    )
+    INSERT INTO user_section_stats (
+        user_id, section, questions_attempted, questions_correct, marks_sum, unique_questions_covered,
+        bof_attempted, bof_correct, tf_attempted, tf_marks_sum, last_attempted
+    )
+    SELECT
+        t.user_id, t.section, t.attempted, t.correct, t.marks_sum, COALESCE(c.new_unique, 0),
+        t.bof_attempted, t.bof_correct, t.tf_attempted, t.tf_marks_sum, NOW()
+    FROM session_totals t
+    LEFT JOIN seen_counts c ON c.section = t.section
+    ON CONFLICT (user_id, section) DO UPDATE SET
+        questions_attempted = user_section_stats.questions_attempted + EXCLUDED.questions_attempted,
+        questions_correct = user_section_stats.questions_correct + EXCLUDED.questions_correct,
+        marks_sum = user_section_stats.marks_sum + EXCLUDED.marks_sum,
+        unique_questions_covered = user_section_stats.unique_questions_covered + EXCLUDED.unique_questions_covered,
+        bof_attempted = user_section_stats.bof_attempted + EXCLUDED.bof_attempted,
+        bof_correct = user_section_stats.bof_correct + EXCLUDED.bof_correct,
+        tf_attempted = user_section_stats.tf_attempted + EXCLUDED.tf_attempted,
+        tf_marks_sum = user_section_stats.tf_marks_sum + EXCLUDED.tf_marks_sum,
+        last_attempted = GREATEST(user_section_stats.last_attempted, EXCLUDED.last_attempted)
+"""
+
+# Per-section aggregates computed directly from completed attempts, one row per
+# (user, section). A NULL user_id covers every user.
+LIVE_SECTION_STATS_SQL = """
+    SELECT
+        s.user_id,
+        q.section,
+        COUNT(*) AS questions_attempted,
+        COUNT(*) FILTER (WHERE a.is_correct) AS questions_correct,
+        COALESCE(SUM(a.marks_obtained), 0) AS marks_sum,
+        COUNT(DISTINCT a.question_id) AS unique_questions_covered,
+        COUNT(*) FILTER (WHERE a.question_type = 'BOF') AS bof_attempted,
+        COUNT(*) FILTER (WHERE a.question_type = 'BOF' AND a.is_correct) AS bof_correct,
+        COUNT(*) FILTER (WHERE a.question_type = 'TF') AS tf_attempted,
+        COALESCE(SUM(a.marks_obtained) FILTER (WHERE a.question_type = 'TF'), 0) AS tf_marks_sum,
+        MAX(s.completed_at) AS last_attempted
+    FROM attempts a
+    JOIN sessions s ON s.id = a.session_id
+    JOIN questions q ON q.id = a.question_id
+    WHERE s.completed = TRUE AND (%(user_id)s IS NULL OR s.user_id = %(user_id)s)
+    GROUP BY s.user_id, q.section
+"""
+
+# Rebuild statements recompute everything from completed sessions. A NULL
+# user_id rebuilds every user.
+REBUILD_SQL = (
+    """
+    DELETE FROM user_questions_seen
+    WHERE %(user_id)s IS NULL OR user_id = %(user_id)s
+    """,
+    """
+    DELETE FROM user_section_stats
+    WHERE %(user_id)s IS NULL OR user_id = %(user_id)s
+    """,
+    """
+    INSERT INTO user_questions_seen (user_id, question_id, section)
+    SELECT s.user_id, a.question_id, MIN(q.section)
+    FROM attempts a
+    JOIN sessions s ON s.id = a.session_id
+    JOIN questions q ON q.id = a.question_id
+    WHERE s.completed = TRUE AND (%(user_id)s IS NULL OR s.user_id = %(user_id)s)
+    GROUP BY s.user_id, a.question_id
+    """,
+    """
+    INSERT INTO user_section_stats (
+        user_id, section, questions_attempted, questions_correct, marks_sum, unique_questions_covered,
+        bof_attempted, bof_correct, tf_attempted, tf_marks_sum, last_attempted
+    )
+    """ + LIVE_SECTION_STATS_SQL,
+)
+
+
+def record_session(cur, session_id):
+    """Add a completed session's attempts to the owner's aggregates. Caller commits."""
+    cur.execute(RECORD_SESSION_SQL, {"session_id": session_id})
+
+
+def rebuild(cur, user_id=None):
+    """Recompute aggregates from attempt history for one user, or everyone. Caller commits."""
+    # Hold off record_session() from concurrent finishes until this commits;
+    # they then add their session on top of the rebuilt rows.
+    cur.execute("LOCK TABLE user_section_stats, user_questions_seen IN SHARE ROW EXCLUSIVE MODE")
+    params = {"user_id": user_id}
+    for statement in REBUILD_SQL:
+        cur.execute(statement, params)
+
+
+def load_live_section_stats(cur, user_id):
+    """Aggregate the user's history with a GROUP BY; transfers one row per section."""
+    cur.execute(LIVE_SECTION_STATS_SQL, {"user_id": user_id})
+    return cur.fetchall()
+
+
+def load_section_stats(cur, user_id):
+    """
+    Return the user's aggregate rows. History from before user_section_stats
+    existed is backfilled for all users by `flask --app main rebuild-stats`
+    (see migrations/001), never from a request. With
+    DASHBOARD_STATS_SOURCE=live the rows are computed from attempts instead.
+    """
+    if DASHBOARD_STATS_SOURCE == "live":
+        return load_live_section_stats(cur, user_id)
+
+    cur.execute("SELECT * FROM user_section_stats WHERE user_id = %s", (user_id,))
+    return cur.fetchall()
+
+
+def summarize_section_stats(rows):
+    """Turn aggregate rows into the dashboard's per-section progress list and overall totals."""
+    progress = []
+    totals = {
+        "total_attempts": 0,
+        "total_correct": 0,
+        "total_marks": 0.0,
+        "bof_total": 0,
+        "bof_correct": 0,
+        "tf_total": 0,
+        "tf_points": 0.0,
+        "unique_questions_covered": 0,
+    }
+
+    for row in rows:
+        attempts = int(row["questions_attempted"] or 0)
+        marks_sum = float(row["marks_sum"] or 0)
+        progress.append({
+            "section": row["section"],
+            "questions_attempted": attempts,
+            "unique_questions_covered": int(row["unique_questions_covered"] or 0),
+            "questions_correct": int(row["questions_correct"] or 0),
+            "average_score_percentage": round((marks_sum / attempts) * 100, 2) if attempts else 0,
+            "last_attempted": row["last_attempted"]
+        })
+
+        totals["total_attempts"] += attempts
+        totals["total_correct"] += int(row["questions_correct"] or 0)
+        totals["total_marks"] += marks_sum
+        totals["bof_total"] += int(row["bof_attempted"] or 0)
+        totals["bof_correct"] += int(row["bof_correct"] or 0)
+        totals["tf_total"] += int(row["tf_attempted"] or 0)
+        totals["tf_points"] += float(row["tf_marks_sum"] or 0)
+        totals["unique_questions_covered"] += int(row["unique_questions_covered"] or 0)
+
+    return progress, totals
+
+
+@click.command("rebuild-stats")
+@click.option("--user-id", default=None, help="Only rebuild this user's aggregates.")
+def rebuild_stats_command(user_id):
+    """Recompute dashboard aggregates from attempt history to repair drift."""
+    with get_db_connection() as conn:
+        cur = conn.cursor()
+        rebuild(cur, user_id)
+        conn.commit()
+        cur.close()
+    click.echo(f"Rebuilt dashboard aggregates for {'user ' + user_id if user_id else 'all users'}.")